@@ -0,0 +1,136 @@
+"""
+Token-budgeted context assembly for RAG prompts.
+
+Chunks are deduplicated, then added in retrieval order until CONTEXT_MAX_TOKENS
+is reached; the chunk that crosses the budget is truncated (or dropped when
+fewer than CONTEXT_MIN_CHUNK_TOKENS would remain). Tokens are counted with
+tiktoken, or estimated as len(text) // 4 when the encoding can't be loaded.
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.adapters.embedding_cache import normalize_text
+from src.adapters.dedup import NearDuplicateFilter
+
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+CONTEXT_MIN_CHUNK_TOKENS = int(os.getenv("CONTEXT_MIN_CHUNK_TOKENS", "50"))
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "o200k_base")
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """tiktoken encoding, loaded once; None if tiktoken or its BPE file is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(CONTEXT_TOKENIZER)
+                except Exception as e:
+                    print(f"[Context] tiktoken encoding '{CONTEXT_TOKENIZER}' unavailable, estimating tokens: {e}")
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text (estimated as len // 4 without tiktoken)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def dedupe_chunks(chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Drop chunks whose normalized text repeats, or is contained in, an earlier chunk
+    (e.g. the same passage returned by two searches, or an overlap-only chunk), then
+    near-duplicates of earlier chunks (MinHash containment, see dedup.py),
+    trimming the overlap adjacent chunks of the same source share.
+
+    Returns:
+        (unique chunks in original order, number dropped)
+    """
+    kept, kept_texts = [], []
+    for chunk in chunks:
+        text = normalize_text(chunk.get("content", ""))
+        if not text or any(text in seen for seen in kept_texts):
+            continue
+        kept.append(chunk)
+        kept_texts.append(text)
+    kept, _ = NearDuplicateFilter().filter(kept)
+    return kept, len(chunks) - len(kept)
+
+
+def format_chunks(chunks: List[Dict[str, Any]]) -> str:
+    """Render chunks as numbered context text, in the same layout build_context uses."""
+    return "\n\n".join(f"Chunk {i + 1} (source: {c['source']}):\n{c['content']}" for i, c in enumerate(chunks))
+
+
+def build_context(chunks: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Assemble the context text for a RAG prompt within a token budget.
+
+    Args:
+        chunks: Retrieved chunks (dicts with 'content' and 'source'), best first
+        max_tokens: Token budget for the context (CONTEXT_MAX_TOKENS by default, <= 0 for no limit)
+
+    Returns:
+        Tuple of (context text, chunks actually used, stats with the tokens used)
+    """
+    budget = CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+    unique, duplicates = dedupe_chunks(chunks or [])
+
+    parts, used = [], []
+    tokens_used = 0
+    truncated = 0
+    for chunk in unique:
+        header = f"Chunk {len(used) + 1} (source: {chunk['source']}):\n"
+        separator_tokens = 1 if parts else 0  # "\n\n" between chunks
+        content = chunk["content"]
+        cost = count_tokens(header) + count_tokens(content) + separator_tokens
+
+        if budget > 0 and tokens_used + cost > budget:
+            remaining = budget - tokens_used - count_tokens(header) - separator_tokens
+            if remaining < CONTEXT_MIN_CHUNK_TOKENS:
+                break
+            content = truncate_to_tokens(content, remaining)
+            cost = count_tokens(header) + count_tokens(content) + separator_tokens
+            truncated += 1
+
+        parts.append(header + content)
+        used.append(chunk if content == chunk["content"] else {**chunk, "content": content})
+        tokens_used += cost
+        if truncated:
+            break
+
+    stats = {
+        "tokens_used": tokens_used,
+        "token_budget": budget,
+        "chunks_in": len(chunks or []),
+        "chunks_used": len(used),
+        "duplicates_dropped": duplicates,
+        "truncated": truncated,
+        "tokenizer": CONTEXT_TOKENIZER if _get_encoding() is not None else "len/4",
+    }
+    return "\n\n".join(parts), used, stats
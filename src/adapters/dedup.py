@@ -0,0 +1,181 @@
+"""
+Near-duplicate and overlap elimination for retrieved chunks.
+
+Two cases repeat text in a prompt:
+
+- Adjacent chunks of the same PDF share their overlap region (PDF_CHUNK_OVERLAP
+  characters, or the indexer's page overlap). They are otherwise different
+  text, so the shared region is trimmed from the later chunk instead of
+  dropping it.
+- The same passage with small differences (another chunking run, a re-ingested
+  or edited copy, a chunk that mostly repeats a longer one). These are found by
+  MinHash over word shingles: a chunk is dropped when the estimated share of its
+  shingles that also appear in an earlier chunk (containment) reaches
+  DEDUP_CONTAINMENT_THRESHOLD.
+
+Signatures are cached per chunk text.
+"""
+import os
+import re
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+
+from src.adapters.embedding_cache import normalize_text
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+DEDUP_CONTAINMENT_THRESHOLD = float(os.getenv("DEDUP_CONTAINMENT_THRESHOLD", "0.5"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+# Shortest shared region (characters) trimmed between chunks of the same source
+DEDUP_MIN_OVERLAP_CHARS = int(os.getenv("DEDUP_MIN_OVERLAP_CHARS", "50"))
+DEDUP_SIGNATURE_CACHE_SIZE = int(os.getenv("DEDUP_SIGNATURE_CACHE_SIZE", "4096"))
+
+_TOKEN_RE = re.compile(r"\w+")
+_signature_cache = LRUCache(maxsize=max(DEDUP_SIGNATURE_CACHE_SIZE, 1))
+_signature_lock = threading.Lock()
+
+# Multiply-shift hash family (a odd, arithmetic mod 2**64), one (a, b) pair per permutation
+_rng = np.random.default_rng(20240501)
+_PERM_A = _rng.integers(1, 2**63, size=max(DEDUP_NUM_PERM, 1), dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, size=max(DEDUP_NUM_PERM, 1), dtype=np.uint64)
+_EMPTY = np.full(len(_PERM_A), np.iinfo(np.uint32).max, dtype=np.uint32)
+
+
+def shingles(text: str, shingle_size: int = DEDUP_SHINGLE_SIZE) -> set:
+    """Word shingles of the normalized text."""
+    tokens = _TOKEN_RE.findall(normalize_text(text))
+    if not tokens:
+        return set()
+    size = max(1, min(shingle_size, len(tokens)))
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash(text: str) -> Tuple[np.ndarray, int]:
+    """
+    MinHash signature of a chunk's word shingles.
+
+    Returns:
+        (DEDUP_NUM_PERM minimum hash values as uint32, number of distinct shingles)
+    """
+    items = shingles(text)
+    if not items:
+        return _EMPTY, 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in items],
+        dtype=np.uint64,
+    )
+    # (a * h + b) mod 2**64, keeping the high 32 bits; one row per permutation
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32), len(items)
+
+
+def chunk_signature(text: str) -> Tuple[np.ndarray, int]:
+    """MinHash of a chunk, cached by the digest of its normalized text."""
+    key = hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).digest()
+    with _signature_lock:
+        signature = _signature_cache.get(key)
+    if signature is None:
+        signature = minhash(text)
+        with _signature_lock:
+            _signature_cache[key] = signature
+    return signature
+
+
+def containment(jaccard: np.ndarray, size: int, other_sizes: np.ndarray) -> np.ndarray:
+    """Share of a set's shingles found in each other set, from estimated Jaccard similarity and set sizes."""
+    intersection = jaccard * (size + other_sizes) / (1.0 + jaccard)
+    return intersection / max(size, 1)
+
+
+def _overlap(left: str, right: str, min_chars: int) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right` (0 if shorter than min_chars)."""
+    if min_chars <= 0 or len(left) < min_chars or len(right) < min_chars:
+        return 0
+    head = right[:min_chars]
+    start = left.find(head, max(0, len(left) - len(right)))
+    while start != -1:
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start = left.find(head, start + 1)
+    return 0
+
+
+class NearDuplicateFilter:
+    """
+    Chunks seen so far (one call, or one orchestrated turn) with duplicate and overlap checks.
+
+    A turn holds a few dozen chunks, so each check compares the new signature
+    against all kept signatures in one vectorized step.
+    """
+
+    def __init__(self, threshold: float = DEDUP_CONTAINMENT_THRESHOLD, min_overlap: int = DEDUP_MIN_OVERLAP_CHARS):
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self._signatures: List[np.ndarray] = []
+        self._sizes: List[int] = []
+        self._texts: List[Tuple[Optional[str], str]] = []  # (source, whitespace-normalized text)
+        self.size = 0
+        self.trimmed = 0
+
+    def contains(self, signature: Tuple[np.ndarray, int]) -> bool:
+        """True if most of the chunk's shingles already appear in a kept chunk."""
+        values, size = signature
+        if not self._signatures or size == 0:
+            return False
+        jaccard = (np.stack(self._signatures) == values).mean(axis=1)
+        return bool((containment(jaccard, size, np.asarray(self._sizes)) >= self.threshold).any())
+
+    def add(self, signature: Tuple[np.ndarray, int], text: str = "", source: Optional[str] = None):
+        self._signatures.append(signature[0])
+        self._sizes.append(signature[1])
+        self._texts.append((source, " ".join(text.split())))
+        self.size += 1
+
+    def trim_overlap(self, text: str, source: Optional[str]) -> str:
+        """Remove regions the text shares with the start or end of kept chunks from the same source."""
+        if source is None:
+            return text
+        trimmed = " ".join(text.split())
+        for seen_source, seen in self._texts:
+            if seen_source != source:
+                continue
+            head = _overlap(seen, trimmed, self.min_overlap)
+            if head:
+                trimmed = trimmed[head:].lstrip()
+            tail = _overlap(trimmed, seen, self.min_overlap)
+            if tail:
+                trimmed = trimmed[:-tail].rstrip()
+        return trimmed
+
+    def filter(self, chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Keep chunks that are not near-duplicates of a chunk already seen, trimming the
+        overlap they share with kept chunks of the same source, and remember them.
+
+        Returns:
+            (kept chunks in original order, number dropped)
+        """
+        if not DEDUP_ENABLED:
+            return list(chunks), 0
+        kept = []
+        for chunk in chunks:
+            content = chunk.get("content", "")
+            source = chunk.get("source")
+            # Trim shared overlap first: adjacent chunks would otherwise count as partly contained
+            trimmed = self.trim_overlap(content, source)
+            is_trimmed = trimmed != " ".join(content.split())
+            if is_trimmed and len(trimmed) < self.min_overlap:
+                continue  # nothing left beyond the shared regions
+            signature = chunk_signature(trimmed if is_trimmed else content)
+            if self.contains(signature):
+                continue
+            self.add(signature, content, source)
+            if is_trimmed:
+                self.trimmed += 1
+                chunk = {**chunk, "content": trimmed}
+            kept.append(chunk)
+        return kept, len(chunks) - len(kept)
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from cachetools import TTLCache
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for cache keys: collapse whitespace and lowercase.
+
+    Args:
+        text: Raw query text
+
+    Returns:
+        Normalized text
+    """
+    return " ".join((text or "").split()).lower()
+
+
+class EmbeddingCache:
+    """
+    Bounded cache for query embeddings.
+
+    The in-process tier is an LRU cache with per-entry TTL. When a persist_path
+    is given, embeddings are also written to a small SQLite file so repeated
+    questions stay cheap across restarts.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: int = 86400, persist_path: Optional[str] = None):
+        self.enabled = maxsize > 0
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self._memory = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.enabled and persist_path:
+            self._open_disk(persist_path)
+
+    def _open_disk(self, path: str):
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"[Embedding Cache] Persistent tier disabled ({path}): {e}")
+            self._conn = None
+
+    @staticmethod
+    def make_key(text: str, deployment: str) -> str:
+        raw = f"{deployment or ''}\x00{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text: str, deployment: str) -> Optional[List[float]]:
+        """Return the cached embedding for text, or None on a miss."""
+        if not self.enabled:
+            return None
+        key = self.make_key(text, deployment)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self.hits += 1
+                return vector
+
+            vector = self._disk_get(key)
+            if vector is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._memory[key] = vector
+                return vector
+
+            self.misses += 1
+            return None
+
+    def set(self, text: str, deployment: str, vector: List[float]):
+        """Store an embedding in memory and, if configured, on disk."""
+        if not self.enabled:
+            return
+        key = self.make_key(text, deployment)
+        with self._lock:
+            self._memory[key] = vector
+            self._disk_set(key, vector)
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT vector, created FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            vector_json, created = row
+            if time.time() - created > self.ttl:
+                self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return json.loads(vector_json)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"[Embedding Cache] Disk read failed: {e}")
+            return None
+
+    def _disk_set(self, key: str, vector: List[float]):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created) VALUES (?, ?, ?)",
+                (key, json.dumps(vector), time.time()),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"[Embedding Cache] Disk write failed: {e}")
+
+    def clear(self):
+        """Drop every cached embedding, including the persistent tier."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for debug output."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._memory),
+            "persistent": self._conn is not None,
+        }
@@ -0,0 +1,115 @@
+"""
+Local hybrid retrieval: an inverted-index BM25 engine and reciprocal rank fusion (RRF).
+
+LocalVectorStore runs a vector search and a BM25 search over the same chunks and
+fuses the two candidate lists with weighted RRF, mirroring the hybrid ranking
+Azure AI Search applies to search_text + vector_queries.
+"""
+import os
+import re
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fusion settings: a weight of 0 disables that engine; candidate sizes bound the work per engine
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_TEXT_WEIGHT = float(os.getenv("HYBRID_TEXT_WEIGHT", "1.0"))
+HYBRID_VECTOR_CANDIDATES = int(os.getenv("HYBRID_VECTOR_CANDIDATES", "50"))
+HYBRID_TEXT_CANDIDATES = int(os.getenv("HYBRID_TEXT_CANDIDATES", "50"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were what which who with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without common English stopwords."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an in-memory inverted index.
+
+    Each term maps to parallel arrays of document ids and term frequencies, so a
+    query only touches the postings of its own terms instead of every document.
+    """
+
+    def __init__(self, texts: Sequence[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(texts)
+
+        postings = defaultdict(lambda: ([], []))
+        lengths = np.zeros(self.n_docs, dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                ids, tfs = postings[term]
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        self.doc_lengths = lengths
+        self.avg_length = float(lengths.mean()) if self.n_docs else 0.0
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            term: (np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (ids, tfs) in postings.items()
+        }
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings[term][0]) if term in self.postings else 0
+        return math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Score documents containing at least one query term.
+
+        Returns:
+            Up to k (doc id, score) pairs, best first
+        """
+        if not self.n_docs or k <= 0:
+            return []
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / (self.avg_length or 1.0))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            scores[ids] += self.idf(term) * tfs * (self.k1 + 1) / (tfs + norm[ids])
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        k = min(k, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], weights: Optional[Sequence[float]] = None, rrf_k: int = HYBRID_RRF_K) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked id lists: score(d) = sum_i weight_i / (rrf_k + rank_i(d)), ranks starting at 1.
+
+    Args:
+        rankings: One ranked list of ids per engine, best first
+        weights: Weight per ranking (default 1.0 each)
+        rrf_k: Damping constant; larger values flatten the contribution of top ranks
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += weight / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,350 @@
+"""
+Local PDF ingestion: extract, chunk, embed and index documents without the Azure indexer.
+
+Text is extracted from each PDF in a process pool, split into overlapping chunks,
+embedded in batches and written through an IndexWriter. Documents use the field
+shape retrieve_context expects: content, content_vector and metadata_storage_name.
+
+Usage:
+    python src/adapters/pdf_ingest.py [--data-dir data/pdfs] [--writer azure|jsonl|local] [--output PATH]
+                                      [--chunk-size 1000] [--overlap 200] [--workers 4] [--batch-size 16]
+"""
+import os, sys
+import json
+import time
+import glob
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+load_dotenv()
+
+# Chunking and throughput settings (chunk size and overlap are in characters)
+PDF_DATA_DIR = os.getenv("PDF_DATA_DIR", os.path.join(ROOT_DIR, "data", "pdfs"))
+PDF_CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE", "1000"))
+PDF_CHUNK_OVERLAP = int(os.getenv("PDF_CHUNK_OVERLAP", "200"))
+PDF_EMBED_BATCH_SIZE = int(os.getenv("PDF_EMBED_BATCH_SIZE", "16"))
+PDF_INGEST_WORKERS = int(os.getenv("PDF_INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Key field of the target search index
+PDF_INDEX_KEY_FIELD = os.getenv("PDF_INDEX_KEY_FIELD", "id")
+
+
+# Extraction (runs in worker processes, so it must stay a top-level function)
+def extract_pdf_text(path: str) -> Tuple[str, str]:
+    """
+    Extract the text of every page of a PDF.
+
+    Args:
+        path: Path to the PDF file
+
+    Returns:
+        (file name, extracted text)
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    pages = [page.extract_text() or "" for page in reader.pages]
+    return os.path.basename(path), "\n".join(pages)
+
+
+def chunk_text(text: str, size: int = PDF_CHUNK_SIZE, overlap: int = PDF_CHUNK_OVERLAP) -> List[str]:
+    """
+    Split text into chunks of about `size` characters, each sharing `overlap` characters
+    with the previous one. Chunk ends are moved back to the last whitespace so words
+    are not cut in half.
+
+    Args:
+        text: Text to split
+        size: Target chunk length in characters
+        overlap: Characters shared between consecutive chunks
+
+    Returns:
+        List of non-empty chunks
+    """
+    if size <= 0:
+        raise ValueError("chunk size must be positive")
+    overlap = max(0, min(overlap, size // 2))
+    text = " ".join(text.split())
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + overlap + 1, end)
+            if cut > start:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def build_documents(file_name: str, chunks: List[str]) -> List[Dict[str, Any]]:
+    """Build index documents (without vectors) for the chunks of one file."""
+    docs = []
+    for i, chunk in enumerate(chunks):
+        # Stable key: re-ingesting a file overwrites its chunks; writers remove chunks past the new count
+        key = hashlib.sha1(f"{file_name}:{i}".encode("utf-8")).hexdigest()
+        docs.append({
+            PDF_INDEX_KEY_FIELD: key,
+            "content": chunk,
+            "metadata_storage_name": file_name,
+        })
+    return docs
+
+
+# Embedding
+def azure_embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed a batch of texts with the Azure OpenAI embedding deployment used for queries."""
+    from src.adapters.rag_chat import aoai_client, AZURE_OPENAI_EMBED_DEPLOYMENT
+
+    resp = aoai_client.embeddings.create(model=AZURE_OPENAI_EMBED_DEPLOYMENT, input=texts)
+    return [item.embedding for item in sorted(resp.data, key=lambda item: item.index)]
+
+
+def embed_documents(docs: List[Dict[str, Any]], embed_fn: Callable[[List[str]], List[List[float]]] = azure_embed_texts, batch_size: int = PDF_EMBED_BATCH_SIZE):
+    """Fill in content_vector for every document, sending `batch_size` chunks per request."""
+    for start in range(0, len(docs), batch_size):
+        batch = docs[start:start + batch_size]
+        vectors = embed_fn([doc["content"] for doc in batch])
+        for doc, vector in zip(batch, vectors):
+            doc["content_vector"] = vector
+
+
+# Index writers
+class IndexWriter:
+    """Destination for ingested documents. Subclasses implement write()."""
+
+    def write(self, docs: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replaced_files(docs: List[Dict[str, Any]]) -> set:
+    """Names of the files a batch of documents replaces."""
+    return {doc["metadata_storage_name"] for doc in docs}
+
+
+class AzureSearchIndexWriter(IndexWriter):
+    """
+    Uploads documents to an Azure AI Search index (merge-or-upload, in batches).
+    Chunks a file had before this write and no longer has are deleted afterwards,
+    so a file that now yields fewer chunks leaves nothing stale behind.
+    """
+
+    def __init__(self, search_client=None, batch_size: int = 500):
+        if search_client is None:
+            from src.adapters.rag_chat import get_search_client
+            search_client = get_search_client()
+        self.search_client = search_client
+        self.batch_size = batch_size
+
+    def existing_keys(self, file_name: str) -> List[str]:
+        """Keys of the documents currently indexed for a file."""
+        escaped = file_name.replace("'", "''")
+        results = self.search_client.search(
+            search_text="*",
+            filter=f"metadata_storage_name eq '{escaped}'",
+            select=[PDF_INDEX_KEY_FIELD],
+        )
+        return [result[PDF_INDEX_KEY_FIELD] for result in results]
+
+    def write(self, docs: List[Dict[str, Any]]):
+        stale = []
+        new_keys = {doc[PDF_INDEX_KEY_FIELD] for doc in docs}
+        for file_name in replaced_files(docs):
+            try:
+                stale.extend(key for key in self.existing_keys(file_name) if key not in new_keys)
+            except Exception as e:
+                print(f"⚠️ Could not list existing chunks of {file_name}, old chunks may remain: {e}")
+        for start in range(0, len(docs), self.batch_size):
+            results = self.search_client.merge_or_upload_documents(documents=docs[start:start + self.batch_size])
+            failed = [r.key for r in results if not r.succeeded]
+            if failed:
+                print(f"⚠️ {len(failed)} documents failed to index: {failed[:5]}")
+        for start in range(0, len(stale), self.batch_size):
+            batch = stale[start:start + self.batch_size]
+            self.search_client.delete_documents(documents=[{PDF_INDEX_KEY_FIELD: key} for key in batch])
+        if stale:
+            print(f"🧹 Deleted {len(stale)} stale chunks")
+
+
+class JsonlIndexWriter(IndexWriter):
+    """
+    Writes documents to a JSON Lines file, one document per line.
+    The file is rewritten on close: documents of files ingested again are replaced,
+    those of other files are kept.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._docs: List[Dict[str, Any]] = []
+
+    def write(self, docs: List[Dict[str, Any]]):
+        self._docs.extend(docs)
+
+    def close(self):
+        if not self._docs:
+            return
+        replaced = replaced_files(self._docs)
+        kept = []
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                kept = [doc for doc in map(json.loads, filter(str.strip, f)) if doc.get("metadata_storage_name") not in replaced]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for doc in kept + self._docs:
+                f.write(json.dumps(doc) + "\n")
+        os.replace(tmp_path, self.path)
+        print(f"✅ Wrote {len(kept) + len(self._docs)} chunks to {self.path}")
+
+
+class LocalVectorStoreWriter(IndexWriter):
+    """
+    Collects documents and saves them as a LocalVectorStore on close.
+    Documents already in the store are kept unless their file was ingested again.
+    """
+
+    def __init__(self, path: str, ivf_lists: int = 0):
+        self.path = path
+        self.ivf_lists = ivf_lists
+        self._docs: Dict[str, Dict[str, Any]] = {}
+
+    def write(self, docs: List[Dict[str, Any]]):
+        for doc in docs:
+            self._docs[doc[PDF_INDEX_KEY_FIELD]] = doc
+
+    def close(self):
+        from src.adapters.vector_store import LocalVectorStore
+
+        if not self._docs:
+            return
+        replaced = replaced_files(list(self._docs.values()))
+        merged = {
+            doc[PDF_INDEX_KEY_FIELD]: doc
+            for doc in LocalVectorStore.load_documents(self.path)
+            if doc.get("metadata_storage_name") not in replaced
+        }
+        merged.update(self._docs)
+        LocalVectorStore.save(self.path, list(merged.values()), ivf_lists=self.ivf_lists)
+        print(f"✅ Saved local vector store with {len(merged)} chunks to {self.path}")
+
+
+# Pipeline
+def ingest_pdfs(
+    paths: Iterable[str],
+    writer: IndexWriter,
+    chunk_size: int = PDF_CHUNK_SIZE,
+    overlap: int = PDF_CHUNK_OVERLAP,
+    workers: int = PDF_INGEST_WORKERS,
+    batch_size: int = PDF_EMBED_BATCH_SIZE,
+    embed_fn: Callable[[List[str]], List[List[float]]] = azure_embed_texts,
+) -> Dict[str, Any]:
+    """
+    Extract, chunk, embed and write a set of PDFs.
+    Extraction runs in a process pool; each file is chunked, embedded and written as soon
+    as its text is ready, so embedding overlaps with extraction of the remaining files.
+
+    Args:
+        paths: PDF file paths
+        writer: IndexWriter that receives the documents
+        chunk_size: Target chunk length in characters
+        overlap: Characters shared between consecutive chunks
+        workers: Extraction processes
+        batch_size: Chunks per embeddings request
+        embed_fn: Batch embedding function (texts -> vectors)
+
+    Returns:
+        Report with per-file chunk counts, failures and throughput
+    """
+    paths = list(paths)
+    report = {"files": {}, "failed": {}, "chunks": 0}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(extract_pdf_text, path): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                file_name, text = future.result()
+                docs = build_documents(file_name, chunk_text(text, chunk_size, overlap))
+                embed_documents(docs, embed_fn=embed_fn, batch_size=batch_size)
+                writer.write(docs)
+            except Exception as e:
+                print(f"❌ Failed to ingest {path}: {e}")
+                report["failed"][os.path.basename(path)] = str(e)
+                continue
+            report["files"][file_name] = len(docs)
+            report["chunks"] += len(docs)
+            print(f"✅ Ingested {file_name}: {len(docs)} chunks")
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["chunks_per_sec"] = round(report["chunks"] / elapsed, 1) if elapsed > 0 else 0.0
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Extract, chunk, embed and index local PDFs.")
+    parser.add_argument("files", nargs="*", help="PDF files to ingest (default: every PDF in --data-dir)")
+    parser.add_argument("--data-dir", default=PDF_DATA_DIR, help="Directory scanned for *.pdf when no files are given")
+    parser.add_argument("--writer", choices=["azure", "jsonl", "local"], default="azure", help="Where the documents are written")
+    parser.add_argument("--output", help="Output file for --writer jsonl (default data/pdf_chunks.jsonl) or directory for --writer local (default LOCAL_VECTOR_STORE_PATH)")
+    parser.add_argument("--ivf-lists", type=int, default=0, help="Build an IVF index with this many lists (--writer local)")
+    parser.add_argument("--chunk-size", type=int, default=PDF_CHUNK_SIZE)
+    parser.add_argument("--overlap", type=int, default=PDF_CHUNK_OVERLAP)
+    parser.add_argument("--workers", type=int, default=PDF_INGEST_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=PDF_EMBED_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    paths = args.files or sorted(glob.glob(os.path.join(args.data_dir, "*.pdf")))
+    if not paths:
+        print(f"No PDFs found in {args.data_dir}")
+        return
+
+    if args.writer == "jsonl":
+        writer = JsonlIndexWriter(args.output or os.path.join(ROOT_DIR, "data", "pdf_chunks.jsonl"))
+    elif args.writer == "local":
+        from src.adapters.vector_store import LOCAL_VECTOR_STORE_PATH
+        writer = LocalVectorStoreWriter(args.output or LOCAL_VECTOR_STORE_PATH, ivf_lists=args.ivf_lists)
+    else:
+        writer = AzureSearchIndexWriter()
+    with writer:
+        report = ingest_pdfs(
+            paths,
+            writer,
+            chunk_size=args.chunk_size,
+            overlap=args.overlap,
+            workers=args.workers,
+            batch_size=args.batch_size,
+        )
+    print(f"Done: {report['chunks']} chunks from {len(report['files'])} files in {report['seconds']}s "
+          f"({report['chunks_per_sec']} chunks/s, {len(report['failed'])} failed)")
+    if args.writer != "jsonl" and report["chunks"]:
+        from src.index_version import bump_index_version
+        bump_index_version(f"pdf_ingest:{args.writer}")
+
+
+if __name__ == "__main__":
+    main()
@@ -111,15 +111,26 @@
 #     return resp.choices[0].message.content
 
 
-import os
+import os, sys
 import base64
+import threading
 from urllib.parse import urlparse, unquote # Import unquote
 from dotenv import load_dotenv
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents import SearchClient
-from azure.search.documents.models import VectorizedQuery
 from openai import AzureOpenAI
 import re # Import re for regex
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.adapters.embedding_cache import EmbeddingCache
+from src.adapters.vector_store import VectorStore, AzureSearchVectorStore, LocalVectorStore
+from src.adapters.rerank import Reranker
+from src.adapters.context_budget import build_context
+from src.index_version import read_index_version
  
 # Load environment variables
 load_dotenv()
@@ -139,10 +150,16 @@ def _validate_endpoint(name: str, url: str):
     if not (url.startswith("http://") or url.startswith("https://")):
         raise RuntimeError(f"Environment variable {name} should start with 'https://' - found: {url}")
  
+# Retrieval backend: 'azure' (Azure AI Search) or 'local' (in-process store, see vector_store.py)
+VECTOR_STORE_BACKEND = env("VECTOR_STORE_BACKEND", "azure").lower()
+if VECTOR_STORE_BACKEND not in ("azure", "local"):
+    raise RuntimeError(f"VECTOR_STORE_BACKEND must be 'azure' or 'local' - found: {VECTOR_STORE_BACKEND}")
+USE_AZURE_SEARCH = VECTOR_STORE_BACKEND == "azure"
+
 # Azure Config
-SEARCH_ENDPOINT = env("AZURE_SEARCH_ENDPOINT", required=True)
-SEARCH_INDEX_NAME = env("AZURE_SEARCH_INDEX", required=True)
-SEARCH_API_KEY = env("AZURE_SEARCH_KEY", required=True)
+SEARCH_ENDPOINT = env("AZURE_SEARCH_ENDPOINT", required=USE_AZURE_SEARCH)
+SEARCH_INDEX_NAME = env("AZURE_SEARCH_INDEX", required=USE_AZURE_SEARCH)
+SEARCH_API_KEY = env("AZURE_SEARCH_KEY", required=USE_AZURE_SEARCH)
 AZURE_OPENAI_ENDPOINT = env("AZURE_OPENAI_ENDPOINT", required=True)
 AZURE_OPENAI_API_KEY = env("AZURE_OPENAI_API_KEY", required=True)
 AZURE_OPENAI_API_VERSION = env("AZURE_OPENAI_API_VERSION", "2024-06-01")
@@ -151,6 +168,16 @@ AZURE_OPENAI_EMBED_DEPLOYMENT = env("AZURE_OPENAI_EMBED_DEPLOYMENT", required=Tr
  
 _validate_endpoint("AZURE_OPENAI_ENDPOINT", AZURE_OPENAI_ENDPOINT)
 _validate_endpoint("SEARCH_ENDPOINT", SEARCH_ENDPOINT)
+
+# Query-embedding cache (set EMBED_CACHE_SIZE=0 to disable, EMBED_CACHE_PATH to persist)
+EMBED_CACHE_SIZE = int(env("EMBED_CACHE_SIZE", "2048"))
+EMBED_CACHE_TTL = int(env("EMBED_CACHE_TTL", "86400"))
+EMBED_CACHE_PATH = env("EMBED_CACHE_PATH")
+# In-memory cache for chunk embeddings computed by the re-ranker (kept apart from query embeddings)
+RERANK_CHUNK_CACHE_SIZE = int(env("RERANK_CHUNK_CACHE_SIZE", "1024"))
+
+# Upper bound on concurrent searches issued by retrieve_context_many
+RETRIEVE_MAX_WORKERS = int(env("RETRIEVE_MAX_WORKERS", "8"))
  
 # Clients
 def get_search_client() -> SearchClient:
@@ -167,16 +194,100 @@ def get_aoai_client() -> AzureOpenAI:
         api_version=AZURE_OPENAI_API_VERSION,
     )
  
-search_client = get_search_client()
+def get_vector_store() -> VectorStore:
+    if USE_AZURE_SEARCH:
+        return AzureSearchVectorStore(search_client)
+    return LocalVectorStore()
+
+search_client = get_search_client() if USE_AZURE_SEARCH else None
 aoai_client = get_aoai_client()
+vector_store = get_vector_store()
+# Index version the local store was loaded at (pdf_ingest --writer local bumps it)
+_vector_store_version = read_index_version()["version"]
+_vector_store_lock = threading.Lock()
+# Optional re-ranking of over-fetched hits (RERANK_* settings); candidates without stored vectors are embedded
+reranker = Reranker(embed_fn=lambda texts: embed_chunks(texts))
+embedding_cache = EmbeddingCache(
+    maxsize=EMBED_CACHE_SIZE,
+    ttl=EMBED_CACHE_TTL,
+    persist_path=EMBED_CACHE_PATH,
+)
+chunk_embedding_cache = EmbeddingCache(maxsize=RERANK_CHUNK_CACHE_SIZE, ttl=EMBED_CACHE_TTL)
  
 # Embedding
 def embed_query(text: str):
+    cached = embedding_cache.get(text, AZURE_OPENAI_EMBED_DEPLOYMENT)
+    if cached is not None:
+        return cached
+
     resp = aoai_client.embeddings.create(
         model=AZURE_OPENAI_EMBED_DEPLOYMENT,
         input=text
     )
-    return resp.data[0].embedding
+    vector = resp.data[0].embedding
+    embedding_cache.set(text, AZURE_OPENAI_EMBED_DEPLOYMENT, vector)
+    return vector
+
+
+def embed_queries(texts: list, cache: EmbeddingCache = None) -> list:
+    """
+    Embed several queries with a single batched embeddings request.
+    Cached queries are served from the embedding cache and only the
+    misses are sent to Azure OpenAI.
+   
+    Args:
+        texts: List of query strings
+        cache: Cache to use instead of the query embedding cache
+       
+    Returns:
+        List of embedding vectors in the same order as texts
+    """
+    cache = cache or embedding_cache
+    vectors = [cache.get(t, AZURE_OPENAI_EMBED_DEPLOYMENT) for t in texts]
+    missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+    if missing:
+        resp = aoai_client.embeddings.create(
+            model=AZURE_OPENAI_EMBED_DEPLOYMENT,
+            input=missing
+        )
+        fetched = {}
+        for item in resp.data:
+            fetched[missing[item.index]] = item.embedding
+            cache.set(missing[item.index], AZURE_OPENAI_EMBED_DEPLOYMENT, item.embedding)
+        vectors = [v if v is not None else fetched[t] for t, v in zip(texts, vectors)]
+    return vectors
+
+
+def refresh_vector_store(version: int) -> VectorStore:
+    """
+    Reload the local store if the index version moved since it was loaded, so a
+    new local ingest is served without restarting the process. Azure Search needs
+    no reload.
+
+    Args:
+        version: Current index version (see src/index_version.py)
+
+    Returns:
+        The vector store to search
+    """
+    global vector_store, _vector_store_version
+    if USE_AZURE_SEARCH or version == _vector_store_version:
+        return vector_store
+    with _vector_store_lock:
+        if version != _vector_store_version:
+            print(f"[RAG] Index version {_vector_store_version} -> {version}, reloading local vector store")
+            # Build (and index) the new store completely, then swap the reference in one assignment;
+            # searches in flight keep the store they started with
+            fresh = LocalVectorStore()
+            fresh.bm25
+            vector_store = fresh
+            _vector_store_version = version
+    return vector_store
+
+
+def embed_chunks(texts: list) -> list:
+    """Embed re-rank candidates whose stored vectors are unavailable, through the in-memory chunk cache."""
+    return embed_queries(texts, cache=chunk_embedding_cache)
  
  
 def extract_pdf_name(source_value: str) -> str:
@@ -242,18 +353,67 @@ def extract_pdf_name(source_value: str) -> str:
  
  
 # Retrieval
-def retrieve_context(query: str, k: int = 5):
+def retrieve_context(query: str, k: int = 5, qvec: list = None):
+    if qvec is None:
+        try:
+            qvec = embed_query(query)
+        except Exception as e:
+            # The store falls back to text-only search without a vector
+            print(f"[RAG] Query embedding failed, using text search: {e}")
+    store = vector_store  # One store for search and re-rank, even if a reload swaps it meanwhile
+    results = store.search(query, qvec, reranker.fetch_size(k))
+    results = rerank_hits(query, qvec, results, k, store)
+ 
+    return parse_search_results(results)
+
+
+def rerank_hits(query: str, qvec: list, hits: list, k: int, store: VectorStore = None) -> list:
+    """Re-rank over-fetched hits (returned by `store`) down to k; keeps the retrieval order if re-ranking fails."""
+    if not reranker.enabled or len(hits) <= k:
+        return hits[:k]
     try:
-        qvec = embed_query(query)
-        vq = VectorizedQuery(vector=qvec, k_nearest_neighbors=k, fields="content_vector")
-        results = search_client.search(
-            search_text=query,
-            vector_queries=[vq],
-            top=k,
-        )
-    except Exception:
-        results = search_client.search(search_text=query, top=k)
- 
+        return reranker.rerank(query, qvec, hits, k, vectors=(store or vector_store).document_vectors(hits))
+    except Exception as e:
+        print(f"[RAG] Re-ranking failed, using retrieval order: {e}")
+        return hits[:k]
+
+
+def retrieve_context_many(queries: list, k: int = 5) -> list:
+    """
+    Retrieve context for several queries at once: all queries are embedded
+    in one batched request, then the searches run concurrently.
+   
+    Args:
+        queries: List of query strings
+        k: Number of chunks to retrieve per query
+       
+    Returns:
+        List of chunk lists, one per query, in the same order as queries
+    """
+    if not queries:
+        return []
+   
+    try:
+        vectors = embed_queries(queries)
+    except Exception as e:
+        print(f"[RAG] Batched embedding failed, embedding per query: {e}")
+        vectors = [None] * len(queries)
+   
+    workers = max(1, min(len(queries), RETRIEVE_MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda q, v: retrieve_context(q, k=k, qvec=v), queries, vectors))
+
+
+def parse_search_results(results) -> list:
+    """
+    Normalize raw search hits into chunk dictionaries
+   
+    Args:
+        results: Iterable of search result documents
+       
+    Returns:
+        List of dicts with 'content', 'source' and 'raw_source' keys
+    """
     ctx = []
     content_fields = ["content", "text", "content_text", "body", "metadata_content"]
     source_fields = ["source", "metadata_storage_path", "metadata_storage_name", "file_name", "id", "sourcefile"]
@@ -323,15 +483,16 @@ def format_sources_list(sources: list) -> str:
  
  
 # Context Builder
-def build_context_text(chunks):
+def build_context_text(chunks, max_tokens: int = None):
+    """Deduplicated, token-budgeted context text (see context_budget.build_context for the stats)."""
     if not chunks:
         return ""
-    return "\n\n".join([f"Chunk {i+1} (source: {c['source']}):\n{c['content']}" for i, c in enumerate(chunks)])
+    return build_context(chunks, max_tokens)[0]
  
 # LLM Call
-def ask_llm(query: str, context_text: str, history_msgs: list, chunks: list = None):
+def build_llm_messages(query: str, context_text: str, history_msgs: list, chunks: list = None):
     """
-    Ask LLM with context and automatically format sources.
+    Build the grounded chat messages for a RAG answer.
    
     Args:
         query: User's question
@@ -340,7 +501,7 @@ def ask_llm(query: str, context_text: str, history_msgs: list, chunks: list = No
         chunks: List of chunk dictionaries (to extract sources)
        
     Returns:
-        Answer with properly formatted sources
+        Tuple of (messages, unique retrieved sources)
     """
     # Get all unique sources from the retrieved chunks (before LLM answers)
     all_retrieved_unique_sources = []
@@ -376,14 +537,22 @@ def ask_llm(query: str, context_text: str, history_msgs: list, chunks: list = No
     messages = [{"role": "system", "content": system_prompt}] + history_msgs + [
         {"role": "user", "content": f"Context:\n{context_text}{source_reference_text}\n\nQuestion:\n{query}"}
     ]
+
+    return messages, all_retrieved_unique_sources
+
+
+def finalize_answer_sources(answer: str, all_retrieved_unique_sources: list) -> str:
+    """
+    Post-process an LLM answer so its Sources section only lists retrieved documents.
    
-    resp = aoai_client.chat.completions.create(
-        model=AZURE_OPENAI_CHAT_DEPLOYMENT,
-        messages=messages,
-        temperature=0.2,
-    )
-   
-    answer = resp.choices[0].message.content
+    Args:
+        answer: Raw LLM answer
+        all_retrieved_unique_sources: Unique sources of the retrieved chunks
+       
+    Returns:
+        Answer with properly formatted sources
+    """
+    answer = answer or ""
    
     # Post-process to ensure sources are correctly listed and only used ones are present
     # This involves trying to extract what the LLM *said* it used
@@ -456,6 +625,30 @@ def ask_llm(query: str, context_text: str, history_msgs: list, chunks: list = No
  
  
     return answer
+
+
+def ask_llm(query: str, context_text: str, history_msgs: list, chunks: list = None):
+    """
+    Ask LLM with context and automatically format sources.
+   
+    Args:
+        query: User's question
+        context_text: Retrieved context
+        history_msgs: Conversation history
+        chunks: List of chunk dictionaries (to extract sources)
+       
+    Returns:
+        Answer with properly formatted sources
+    """
+    messages, all_retrieved_unique_sources = build_llm_messages(query, context_text, history_msgs, chunks)
+   
+    resp = aoai_client.chat.completions.create(
+        model=AZURE_OPENAI_CHAT_DEPLOYMENT,
+        messages=messages,
+        temperature=0.2,
+    )
+   
+    return finalize_answer_sources(resp.choices[0].message.content, all_retrieved_unique_sources)
  
 # CLI Testing
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+"""
+Async twin of rag_chat built on AsyncAzureOpenAI.
+
+Configuration, the embedding cache, the vector store and the pure helpers (result
+parsing, prompt building, source formatting) are shared with rag_chat; only the
+OpenAI calls differ. Searches go through VectorStore.asearch, so every backend is
+implemented once in vector_store.py.
+"""
+import os, sys
+import asyncio
+from openai import AsyncAzureOpenAI
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.adapters import rag_chat
+from src.adapters.rag_chat import (
+    AZURE_OPENAI_ENDPOINT,
+    AZURE_OPENAI_API_KEY,
+    AZURE_OPENAI_API_VERSION,
+    AZURE_OPENAI_CHAT_DEPLOYMENT,
+    AZURE_OPENAI_EMBED_DEPLOYMENT,
+    RETRIEVE_MAX_WORKERS,
+    embedding_cache,
+    reranker,
+    rerank_hits,
+    parse_search_results,
+    build_llm_messages,
+    finalize_answer_sources,
+)
+
+# Async clients are bound to the event loop that created them, so they are (re)created
+# per running loop (the Streamlit UI keeps one long-lived loop; scripts use asyncio.run()).
+_clients = {}
+
+
+def _get_clients():
+    loop = asyncio.get_running_loop()
+    if _clients.get("loop") is not loop:
+        _clients["loop"] = loop
+        _clients["aoai"] = AsyncAzureOpenAI(
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            api_key=AZURE_OPENAI_API_KEY,
+            api_version=AZURE_OPENAI_API_VERSION,
+        )
+    return _clients["aoai"]
+
+
+async def close_clients():
+    """Close the async clients of the current event loop."""
+    if _clients.get("loop") is not asyncio.get_running_loop():
+        return
+    await _clients["aoai"].close()
+    _clients.clear()
+
+
+# Embedding
+async def _cache_call(fn, *args):
+    """Embedding-cache access; with the SQLite tier (EMBED_CACHE_PATH) it does disk I/O, so it runs in a worker thread."""
+    if embedding_cache.persist_path:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+def _cache_get_many(texts: list) -> list:
+    return [embedding_cache.get(t, AZURE_OPENAI_EMBED_DEPLOYMENT) for t in texts]
+
+
+def _cache_set_many(items: dict):
+    for text, vector in items.items():
+        embedding_cache.set(text, AZURE_OPENAI_EMBED_DEPLOYMENT, vector)
+
+
+async def embed_query(text: str):
+    cached = await _cache_call(embedding_cache.get, text, AZURE_OPENAI_EMBED_DEPLOYMENT)
+    if cached is not None:
+        return cached
+
+    aoai = _get_clients()
+    resp = await aoai.embeddings.create(
+        model=AZURE_OPENAI_EMBED_DEPLOYMENT,
+        input=text
+    )
+    vector = resp.data[0].embedding
+    await _cache_call(embedding_cache.set, text, AZURE_OPENAI_EMBED_DEPLOYMENT, vector)
+    return vector
+
+
+async def embed_queries(texts: list) -> list:
+    """Async version of rag_chat.embed_queries (one batched request for all cache misses)."""
+    vectors = await _cache_call(_cache_get_many, texts)
+    missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+    if missing:
+        aoai = _get_clients()
+        resp = await aoai.embeddings.create(
+            model=AZURE_OPENAI_EMBED_DEPLOYMENT,
+            input=missing
+        )
+        fetched = {missing[item.index]: item.embedding for item in resp.data}
+        await _cache_call(_cache_set_many, fetched)
+        vectors = [v if v is not None else fetched[t] for t, v in zip(texts, vectors)]
+    return vectors
+
+
+# Retrieval
+async def retrieve_context(query: str, k: int = 5, qvec: list = None):
+    if qvec is None:
+        try:
+            qvec = await embed_query(query)
+        except Exception as e:
+            # The store falls back to text-only search without a vector
+            print(f"[RAG] Query embedding failed, using text search: {e}")
+    store = rag_chat.vector_store  # One store for search and re-rank, even if a reload swaps it meanwhile
+    hits = await store.asearch(query, qvec, reranker.fetch_size(k))
+    return parse_search_results(await _rerank(query, qvec, hits, k, store))
+
+
+async def _rerank(query: str, qvec: list, hits: list, k: int, store=None) -> list:
+    """Run rag_chat.rerank_hits off the event loop (it may embed candidates or run a model)."""
+    if not reranker.enabled or len(hits) <= k:
+        return hits[:k]
+    return await asyncio.to_thread(rerank_hits, query, qvec, hits, k, store)
+
+
+async def retrieve_context_many(queries: list, k: int = 5) -> list:
+    """Async version of rag_chat.retrieve_context_many."""
+    if not queries:
+        return []
+
+    try:
+        vectors = await embed_queries(queries)
+    except Exception as e:
+        print(f"[RAG] Batched embedding failed, embedding per query: {e}")
+        vectors = [None] * len(queries)
+
+    semaphore = asyncio.Semaphore(max(1, RETRIEVE_MAX_WORKERS))
+
+    async def _bounded(q, v):
+        async with semaphore:
+            return await retrieve_context(q, k=k, qvec=v)
+
+    return list(await asyncio.gather(*(_bounded(q, v) for q, v in zip(queries, vectors))))
+
+
+# LLM Call
+async def ask_llm(query: str, context_text: str, history_msgs: list, chunks: list = None):
+    """Async version of rag_chat.ask_llm."""
+    messages, all_retrieved_unique_sources = build_llm_messages(query, context_text, history_msgs, chunks)
+
+    aoai = _get_clients()
+    resp = await aoai.chat.completions.create(
+        model=AZURE_OPENAI_CHAT_DEPLOYMENT,
+        messages=messages,
+        temperature=0.2,
+    )
+
+    return finalize_answer_sources(resp.choices[0].message.content, all_retrieved_unique_sources)
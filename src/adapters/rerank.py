@@ -0,0 +1,140 @@
+"""
+Optional re-ranking stage between retrieval and prompt building.
+
+retrieve_context over-fetches RERANK_CANDIDATES hits, the Reranker re-scores them
+and only the best k are passed on to ask_llm. Two methods are available:
+
+- cosine: cosine similarity between the query embedding and each candidate's
+  embedding (stored vectors when the backend returns them, otherwise embedded
+  in batches through a separate in-memory chunk cache)
+- cross_encoder: a sentence-transformers CrossEncoder scoring (query, chunk)
+  pairs on CPU; falls back to cosine when the package is not installed
+
+Scoring stops when the latency budget is spent; candidates not scored by then
+keep their retrieval order behind the re-scored ones.
+"""
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_METHOD = os.getenv("RERANK_METHOD", "cosine").lower()
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Candidates fetched per query before re-ranking down to k
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+
+
+class Reranker:
+    """Re-scores retrieved hits and keeps the best k."""
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        enabled: bool = RERANK_ENABLED,
+        method: str = RERANK_METHOD,
+        candidates: int = RERANK_CANDIDATES,
+        batch_size: int = RERANK_BATCH_SIZE,
+        budget_ms: float = RERANK_BUDGET_MS,
+        model_name: str = RERANK_MODEL,
+    ):
+        self.embed_fn = embed_fn
+        self.enabled = enabled
+        self.method = method
+        self.candidates = candidates
+        self.batch_size = max(1, batch_size)
+        self.budget_ms = budget_ms
+        self.model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+
+        self.calls = 0
+        self.budget_exceeded = 0
+        self.total_ms = 0.0
+
+    def fetch_size(self, k: int) -> int:
+        """Number of hits retrieve_context should fetch for a final top k."""
+        return max(k, self.candidates) if self.enabled else k
+
+    def _cross_encoder(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                    except ImportError:
+                        print("[Rerank] sentence-transformers not installed, using cosine re-scoring")
+                        self.method = "cosine"
+                        return None
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def rerank(self, query: str, qvec: Optional[List[float]], hits: List[Dict[str, Any]], k: int, vectors: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Re-score hits and return the best k.
+
+        Args:
+            query: Query text
+            qvec: Query embedding (required for cosine re-scoring)
+            hits: Retrieved hits in retrieval order (dicts with 'content')
+            k: Number of hits to keep
+            vectors: Optional embeddings of the hits, one row per hit
+
+        Returns:
+            Up to k hits, best first
+        """
+        if not self.enabled or len(hits) <= k:
+            return hits[:k]
+
+        started = time.perf_counter()
+        deadline = started + self.budget_ms / 1000.0
+        texts = [hit.get("content") or "" for hit in hits]
+
+        model = self._cross_encoder() if self.method == "cross_encoder" else None
+        if model is None and qvec is None:
+            return hits[:k]
+
+        scores: List[float] = []
+        if model is None and vectors is not None:
+            # Stored vectors: one matrix-vector product, no batching needed
+            scores = self._cosine(qvec, np.asarray(vectors, dtype=np.float32)).tolist()
+        else:
+            for start in range(0, len(hits), self.batch_size):
+                if scores and time.perf_counter() > deadline:
+                    self.budget_exceeded += 1
+                    break
+                batch = texts[start:start + self.batch_size]
+                if model is not None:
+                    scores.extend(float(s) for s in model.predict([(query, t) for t in batch]))
+                else:
+                    scores.extend(self._cosine(qvec, np.asarray(self.embed_fn(batch), dtype=np.float32)).tolist())
+
+        scored = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        order = scored + list(range(len(scores), len(hits)))
+        result = [{**hits[i], "@rerank.score": scores[i]} if i < len(scores) else hits[i] for i in order[:k]]
+
+        self.calls += 1
+        self.total_ms += (time.perf_counter() - started) * 1000
+        return result
+
+    @staticmethod
+    def _cosine(qvec: List[float], matrix: np.ndarray) -> np.ndarray:
+        q = np.asarray(qvec, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(q) or 1.0)
+        norms[norms == 0] = 1.0
+        return (matrix @ q) / norms
+
+    def stats(self) -> Dict[str, Any]:
+        """Call counters for debug output."""
+        return {
+            "enabled": self.enabled,
+            "method": self.method,
+            "candidates": self.candidates,
+            "calls": self.calls,
+            "budget_exceeded": self.budget_exceeded,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+        }
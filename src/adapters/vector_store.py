@@ -0,0 +1,319 @@
+"""
+Vector store backends for retrieve_context.
+
+A VectorStore returns raw hit dictionaries (content, metadata_storage_name, ...)
+that parse_search_results turns into chunks, so backends are interchangeable:
+
+- AzureSearchVectorStore: hybrid (text + vector) search on Azure AI Search
+- LocalVectorStore: in-process hybrid search over locally ingested chunks
+  (see src/adapters/pdf_ingest.py --writer local): NumPy vector search (brute
+  force or IVF) and BM25, fused with reciprocal rank fusion
+"""
+import os, sys
+import json
+import time
+import asyncio
+import shutil
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Local store layout: docs.jsonl (documents without vectors), vectors.npy (normalized float32), ivf.npz (optional),
+# written to a new generation directory per save; CURRENT names the live one
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.adapters.hybrid_search import (
+    BM25Index,
+    reciprocal_rank_fusion,
+    HYBRID_VECTOR_WEIGHT,
+    HYBRID_TEXT_WEIGHT,
+    HYBRID_VECTOR_CANDIDATES,
+    HYBRID_TEXT_CANDIDATES,
+    HYBRID_RRF_K,
+)
+
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", os.path.join(ROOT_DIR, "data", "vector_store"))
+LOCAL_VECTOR_STORE_MMAP = os.getenv("LOCAL_VECTOR_STORE_MMAP", "true").lower() in ("1", "true", "yes")
+# Number of IVF lists probed per query (only used when the store was built with --ivf-lists; at least 1)
+LOCAL_IVF_NPROBE = max(1, int(os.getenv("LOCAL_IVF_NPROBE", "8")))
+
+_DOCS_FILE = "docs.jsonl"
+_VECTORS_FILE = "vectors.npy"
+_IVF_FILE = "ivf.npz"
+_CURRENT_FILE = "CURRENT"
+# Generations kept after a save (the new one plus the one before), so a process still loading the old one finds it
+_KEEP_GENERATIONS = 2
+
+
+def _generation_dir(path: str) -> str:
+    """Directory holding the live store files (the store root for stores saved before generations existed)."""
+    try:
+        with open(os.path.join(path, _CURRENT_FILE), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return path
+    return os.path.join(path, name) if name else path
+
+
+class VectorStore:
+    """Search backend used by retrieve_context."""
+
+    def search(self, query: str, vector: Optional[List[float]], k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Return the top k hits for a query.
+
+        Args:
+            query: Query text
+            vector: Query embedding, or None when it could not be computed
+            k: Number of hits to return
+
+        Returns:
+            List of hit dicts (document fields plus '@search.score'), best first
+        """
+        raise NotImplementedError
+
+    async def asearch(self, query: str, vector: Optional[List[float]], k: int = 5) -> List[Dict[str, Any]]:
+        """search() for async callers, run in a worker thread so the event loop is never blocked."""
+        return await asyncio.to_thread(self.search, query, vector, k)
+
+    def document_vectors(self, hits: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Stored embeddings of the given hits (one row per hit), or None if the backend can't provide them."""
+        return None
+
+
+class AzureSearchVectorStore(VectorStore):
+    """
+    Hybrid search on Azure AI Search, falling back to text-only search.
+
+    Hits carry every retrievable field, so when content_vector is retrievable the
+    re-ranker scores the stored vectors instead of embedding the chunk texts.
+    """
+
+    def __init__(self, search_client):
+        self.search_client = search_client
+
+    def search(self, query: str, vector: Optional[List[float]], k: int = 5) -> List[Dict[str, Any]]:
+        from azure.search.documents.models import VectorizedQuery
+
+        try:
+            if vector is None:
+                raise ValueError("no query vector")
+            vq = VectorizedQuery(vector=vector, k_nearest_neighbors=k, fields="content_vector")
+            return list(self.search_client.search(search_text=query, vector_queries=[vq], top=k))
+        except Exception:
+            return list(self.search_client.search(search_text=query, top=k))
+
+    def document_vectors(self, hits: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        vectors = [hit.get("content_vector") for hit in hits]
+        if not vectors or any(v is None for v in vectors):
+            return None
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on normalized vectors; returns normalized centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize_rows(centroids)
+    return centroids
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store over documents ingested locally.
+
+    Vectors are L2-normalized so cosine similarity is a dot product. Without an IVF
+    index every query is a brute-force matrix-vector product; with one, only the
+    `nprobe` closest lists are scored. vectors.npy is memory-mapped by default so
+    large stores are paged in by the OS instead of loaded up front.
+
+    Text queries use a BM25 inverted index built on first use. Engine weights and
+    candidate pool sizes default to the HYBRID_* settings in hybrid_search.py.
+    """
+
+    def __init__(
+        self,
+        path: str = LOCAL_VECTOR_STORE_PATH,
+        mmap: bool = LOCAL_VECTOR_STORE_MMAP,
+        nprobe: int = LOCAL_IVF_NPROBE,
+        vector_weight: float = HYBRID_VECTOR_WEIGHT,
+        text_weight: float = HYBRID_TEXT_WEIGHT,
+        vector_candidates: int = HYBRID_VECTOR_CANDIDATES,
+        text_candidates: int = HYBRID_TEXT_CANDIDATES,
+        rrf_k: int = HYBRID_RRF_K,
+    ):
+        self.path = path
+        self.nprobe = nprobe
+        self.vector_weight = vector_weight
+        self.text_weight = text_weight
+        self.vector_candidates = vector_candidates
+        self.text_candidates = text_candidates
+        self.rrf_k = rrf_k
+        self._bm25 = None
+        self._bm25_lock = threading.Lock()
+        self.docs: List[Dict[str, Any]] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.centroids = None
+        self._list_order = None
+        self._list_offsets = None
+
+        directory = _generation_dir(path)
+        docs_path = os.path.join(directory, _DOCS_FILE)
+        vectors_path = os.path.join(directory, _VECTORS_FILE)
+        if not (os.path.exists(docs_path) and os.path.exists(vectors_path)):
+            print(f"[Vector Store] No local store at {path}; ingest documents with pdf_ingest.py --writer local")
+            return
+
+        with open(docs_path, encoding="utf-8") as f:
+            self.docs = [json.loads(line) for line in f if line.strip()]
+        self.vectors = np.load(vectors_path, mmap_mode="r" if mmap else None)
+
+        ivf_path = os.path.join(directory, _IVF_FILE)
+        if os.path.exists(ivf_path):
+            ivf = np.load(ivf_path)
+            self.centroids = ivf["centroids"]
+            self._list_order = ivf["order"]
+            self._list_offsets = ivf["offsets"]
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @staticmethod
+    def save(path: str, docs: List[Dict[str, Any]], ivf_lists: int = 0):
+        """
+        Write documents (with 'content_vector') as a local store, replacing any existing one.
+
+        Files are written to a new generation directory and CURRENT is switched to it
+        with os.replace, so running processes that memory-map the previous vectors.npy
+        keep a consistent store until they reload.
+
+        Args:
+            path: Store directory
+            docs: Documents with content, content_vector and metadata_storage_name
+            ivf_lists: Number of IVF lists to build (0 for brute force only)
+        """
+        generation = f"gen-{time.time_ns()}"
+        directory = os.path.join(path, generation)
+        os.makedirs(directory)
+        vectors = _normalize_rows(np.asarray([doc["content_vector"] for doc in docs], dtype=np.float32))
+        with open(os.path.join(directory, _DOCS_FILE), "w", encoding="utf-8") as f:
+            for doc in docs:
+                f.write(json.dumps({k: v for k, v in doc.items() if k != "content_vector"}) + "\n")
+        np.save(os.path.join(directory, _VECTORS_FILE), vectors)
+
+        if ivf_lists > 0 and len(docs) > ivf_lists:
+            centroids = _kmeans(vectors, ivf_lists)
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=ivf_lists))])
+            np.savez(os.path.join(directory, _IVF_FILE), centroids=centroids, order=order, offsets=offsets)
+
+        current_tmp = os.path.join(path, f"{_CURRENT_FILE}.tmp")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(current_tmp, os.path.join(path, _CURRENT_FILE))
+        LocalVectorStore._remove_old_generations(path)
+
+    @staticmethod
+    def _remove_old_generations(path: str, keep: int = _KEEP_GENERATIONS):
+        """Best-effort cleanup of superseded generations (and files of the pre-generation layout)."""
+        generations = sorted(name for name in os.listdir(path) if name.startswith("gen-"))
+        for name in generations[:-keep]:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        for name in (_DOCS_FILE, _VECTORS_FILE, _IVF_FILE):
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass  # Absent, or still mapped by a process on Windows
+
+    @staticmethod
+    def load_documents(path: str) -> List[Dict[str, Any]]:
+        """Read a store back as documents with 'content_vector' (used to merge new ingests)."""
+        if not os.path.exists(os.path.join(_generation_dir(path), _DOCS_FILE)):
+            return []
+        store = LocalVectorStore(path, mmap=False)
+        return [{**doc, "content_vector": store.vectors[i].tolist()} for i, doc in enumerate(store.docs)]
+
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if self.centroids is None:
+            return None
+        nprobe = max(1, min(self.nprobe, len(self.centroids)))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self._list_order[self._list_offsets[c]:self._list_offsets[c + 1]] for c in lists])
+
+    @property
+    def bm25(self) -> BM25Index:
+        """BM25 index over the chunk texts, built on first use."""
+        if self._bm25 is None:
+            with self._bm25_lock:
+                if self._bm25 is None:
+                    self._bm25 = BM25Index([doc.get("content", "") for doc in self.docs])
+        return self._bm25
+
+    def vector_search(self, vector: List[float], k: int) -> List[Tuple[int, float]]:
+        """Top k (doc index, cosine similarity) pairs, via IVF lists when available."""
+        q = np.asarray(vector, dtype=np.float32)
+        q /= (np.linalg.norm(q) or 1.0)
+        candidates = self._candidates(q)
+        if candidates is None:
+            scores = self.vectors @ q
+            ids = np.arange(len(scores))
+        else:
+            ids = np.sort(candidates)
+            scores = self.vectors[ids] @ q
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def text_search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Top k (doc index, BM25 score) pairs."""
+        return self.bm25.search(query, k)
+
+    def search(self, query: str, vector: Optional[List[float]], k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Hybrid search: vector and BM25 candidates fused with weighted RRF.
+        With one engine disabled (weight 0, or no query vector) its scores are returned as-is.
+        """
+        if not self.docs or k <= 0:
+            return []
+        vector_weight = self.vector_weight if vector is not None else 0.0
+        text_weight = self.text_weight
+
+        if vector_weight > 0 and text_weight > 0:
+            vector_hits = self.vector_search(vector, max(k, self.vector_candidates))
+            text_hits = self.text_search(query, max(k, self.text_candidates))
+            ranked = reciprocal_rank_fusion(
+                [[i for i, _ in vector_hits], [i for i, _ in text_hits]],
+                weights=[vector_weight, text_weight],
+                rrf_k=self.rrf_k,
+            )[:k]
+        elif vector_weight > 0 or (vector is not None and text_weight <= 0):
+            ranked = self.vector_search(vector, k)
+        else:
+            ranked = self.text_search(query, k)
+
+        return [{**self.docs[i], "@search.score": score, "@search.index": i} for i, score in ranked]
+
+    def document_vectors(self, hits: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not hits or any("@search.index" not in hit for hit in hits):
+            return None
+        return np.asarray(self.vectors[[hit["@search.index"] for hit in hits]])
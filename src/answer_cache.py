@@ -0,0 +1,156 @@
+"""
+Semantic cache for orchestrator answers.
+
+Paraphrases of the same document question ("what is the dosage of X?" / "how
+much X should be given?") embed to nearly the same vector, so an answer can be
+reused when a new query's embedding is within ANSWER_CACHE_THRESHOLD cosine
+similarity of a cached one. Entries are scoped (user role, index version) so
+an answer is never served to a role that could not have produced it, or after
+the document index has changed. Entries expire after ANSWER_CACHE_TTL seconds
+and the least recently used entry is evicted once ANSWER_CACHE_SIZE is reached.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from src.adapters.embedding_cache import normalize_text
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+
+
+class SemanticAnswerCache:
+    """
+    LRU + TTL cache of answers looked up by query embedding similarity.
+
+    Lookups first try the normalized query text (no embedding needed), then
+    compare the query vector against every live entry of the same scope; with a
+    few hundred entries that is one small matrix-vector product.
+    """
+
+    def __init__(self, maxsize: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL, threshold: float = ANSWER_CACHE_THRESHOLD, enabled: bool = ANSWER_CACHE_ENABLED):
+        self.enabled = enabled and maxsize > 0 and ttl > 0
+        self.maxsize = max(maxsize, 1)
+        self.ttl = ttl
+        self.threshold = threshold
+        # (scope, normalized query) -> (unit vector, value, created)
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[Optional[np.ndarray], Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _unit(vector: Optional[List[float]]) -> Optional[np.ndarray]:
+        if vector is None:
+            return None
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else None
+
+    def _expire(self, now: float):
+        expired = [key for key, (_, _, created) in self._entries.items() if now - created > self.ttl]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup_text(self, query: str, scope: Hashable) -> Optional[Any]:
+        """Cached value for the exact (normalized) query text, without an embedding."""
+        if not self.enabled:
+            return None
+        key = (scope, normalize_text(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[2] > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.exact_hits += 1
+            return entry[1]
+
+    def has_entries(self, scope: Hashable) -> bool:
+        """True if the scope has a live entry with an embedding, i.e. a similarity lookup could hit."""
+        if not self.enabled:
+            return False
+        now = time.time()
+        with self._lock:
+            return any(
+                key[0] == scope and entry[0] is not None and now - entry[2] <= self.ttl
+                for key, entry in self._entries.items()
+            )
+
+    def lookup(self, query: str, vector: Optional[List[float]], scope: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Find the cached answer closest to the query within the same scope.
+
+        Args:
+            query: Query text
+            vector: Query embedding (None skips the similarity search)
+            scope: Hashable scope, e.g. (user role, index version)
+
+        Returns:
+            (cached value, similarity) or None on a miss
+        """
+        if not self.enabled:
+            return None
+        exact = self.lookup_text(query, scope)
+        if exact is not None:
+            return exact, 1.0
+
+        q = self._unit(vector)
+        with self._lock:
+            self._expire(time.time())
+            keys = [key for key, entry in self._entries.items() if key[0] == scope and entry[0] is not None]
+            if q is None or not keys:
+                self.misses += 1
+                return None
+            similarities = np.stack([self._entries[key][0] for key in keys]) @ q
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(keys[best])
+            self.hits += 1
+            return self._entries[keys[best]][1], similarity
+
+    def store(self, query: str, vector: Optional[List[float]], scope: Hashable, value: Any):
+        """Cache a value for the query, evicting the least recently used entry when full."""
+        if not self.enabled:
+            return
+        key = (scope, normalize_text(query))
+        with self._lock:
+            self._entries[key] = (self._unit(vector), value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> int:
+        """Drop all entries; returns the number removed."""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "threshold": self.threshold,
+            "evictions": self.evictions,
+        }
@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
  
 from openai import AzureOpenAI
 # Import the tools specification and the tool execution function from mcp_client.py
-from src.clients.mcp_client import TOOLS_SPEC, call_fastapi_tool
+from src.clients.mcp_client import TOOLS_SPEC, call_fastapi_tool, shutdown_http_client
  
 # Azure OpenAI Configuration
 AOAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -100,5 +100,8 @@ async def run_chatbot():
             print(f"An error occurred: {e}")
             messages.append({"role": "assistant", "content": "I encountered an error. Please try again."})
  
+    # Release pooled connections to the FastAPI server
+    await shutdown_http_client()
+ 
 if __name__ == "__main__":
     asyncio.run(run_chatbot())
\ No newline at end of file
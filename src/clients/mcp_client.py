@@ -1,293 +1,537 @@
 import json
 import httpx
 import os
-from typing import Optional
+import sys
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 load_dotenv()
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.response_cache import ResponseCache
+
 # FastAPI Server Base URL - This will be configured in .env or passed
 FASTAPI_BASE_URL = os.getenv("FASTAPI_BASE_URL", "http://127.0.0.1:8001")
 
-# --- Manual Tool Definitions for OpenAI's Function Calling ---
-# These mimic the OpenAPI spec for your routes.
-# Crucially, 'parameters' should match your Pydantic schemas and path/query parameters.
-TOOLS_SPEC = [
+# Connection pool settings for the shared HTTP client
+FASTAPI_TIMEOUT = float(os.getenv("FASTAPI_TIMEOUT", "30"))
+FASTAPI_CONNECT_TIMEOUT = float(os.getenv("FASTAPI_CONNECT_TIMEOUT", "5"))
+FASTAPI_MAX_CONNECTIONS = int(os.getenv("FASTAPI_MAX_CONNECTIONS", "20"))
+FASTAPI_MAX_KEEPALIVE = int(os.getenv("FASTAPI_MAX_KEEPALIVE", "10"))
+FASTAPI_KEEPALIVE_EXPIRY = float(os.getenv("FASTAPI_KEEPALIVE_EXPIRY", "30"))
+FASTAPI_HTTP2 = os.getenv("FASTAPI_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Client-side cache of successful tool responses (MCP_CLIENT_CACHE_TTL=0 disables it)
+MCP_CLIENT_CACHE_SIZE = int(os.getenv("MCP_CLIENT_CACHE_SIZE", "256"))
+MCP_CLIENT_CACHE_TTL = float(os.getenv("MCP_CLIENT_CACHE_TTL", "30"))
+tool_response_cache = ResponseCache(maxsize=MCP_CLIENT_CACHE_SIZE, ttl=MCP_CLIENT_CACHE_TTL, name="tool_client")
+
+# Build the tool table from the FastAPI server's OpenAPI schema instead of the static table below
+MCP_TOOLS_FROM_OPENAPI = os.getenv("MCP_TOOLS_FROM_OPENAPI", "false").lower() in ("1", "true", "yes")
+
+# --- Shared HTTP client ---
+# One pooled AsyncClient per event loop, so tool calls reuse keep-alive connections
+# instead of opening a new TCP connection each time.
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    http2 = FASTAPI_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401  (required by httpx for HTTP/2)
+        except ImportError:
+            print("Warning: FASTAPI_HTTP2 is set but 'h2' is not installed; using HTTP/1.1.")
+            http2 = False
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(FASTAPI_TIMEOUT, connect=FASTAPI_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=FASTAPI_MAX_CONNECTIONS,
+            max_keepalive_connections=FASTAPI_MAX_KEEPALIVE,
+            keepalive_expiry=FASTAPI_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the pooled client for the running event loop, creating it on first use.
+    A client bound to a previous (closed) loop is replaced.
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = _build_http_client()
+        _http_client_loop = loop
+    return _http_client
+
+
+async def startup_http_client() -> httpx.AsyncClient:
+    """Create the shared client up front (call from an app/orchestrator startup hook)."""
+    return get_http_client()
+
+
+async def shutdown_http_client():
+    """Close the shared client and release its pooled connections."""
+    global _http_client, _http_client_loop
+    if _http_client is not None and not _http_client.is_closed:
+        if _http_client_loop is asyncio.get_running_loop():
+            await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
+# Pagination / projection parameters shared by the list tools
+PAGE_PARAMETERS = {
+    "limit": {"type": "integer", "description": "Maximum number of records to return (default 50)"},
+    "offset": {"type": "integer", "description": "Number of records to skip"},
+    "after_id": {"type": "integer", "description": "Only return records with an ID greater than this (use next_after_id of the previous page)"},
+    "fields": {"type": "string", "description": "Comma-separated list of fields to return, e.g. 'id,name'"},
+}
+# Response envelope of the list tools
+PAGE_RESULT_DESCRIPTION = (
+    "Returns {items: [...], has_more: bool, next_after_id: int|null}. "
+    "If has_more is true, call again with after_id=next_after_id for the next page."
+)
+
+# Array parameter of the bulk "*_by_ids" tools, sent as repeated query params (ids=1&ids=2)
+IDS_PARAMETER = {"type": "array", "items": {"type": "integer"}}
+
+# --- Tool Table ---
+# Single declarative source for both the OpenAI tool specs and the HTTP routes.
+# 'parameters' should match the Pydantic schemas and path/query parameters of the FastAPI routes.
+# Parameters that appear in 'path' are substituted into it; all others are sent as query params.
+# 'access': 'self_or_admin' restricts non-admin users to their own record via 'owner_param'.
+# Non-GET (write) routes may list the path prefixes they change under 'invalidates'; their cached
+# responses are dropped after the write succeeds (all cached responses if the route lists none).
+# A list-valued owner_param (bulk lookups) is checked per id: ids the user may not read are dropped and reported.
+TOOL_ROUTES: List[Dict[str, Any]] = [
     {
-        "type": "function",
-        "function": {
-            "name": "get_patient_by_id",
-            "description": "Get patient details by patient ID.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "patient_id": {"type": "integer", "description": "The ID of the patient"}
-                },
-                "required": ["patient_id"],
-            },
+        "name": "get_patient_by_id",
+        "description": "Get patient details by patient ID.",
+        "method": "GET",
+        "path": "/patient/{patient_id}",
+        "parameters": {
+            "patient_id": {"type": "integer", "description": "The ID of the patient"}
         },
+        "required": ["patient_id"],
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_all_patients",
-            "description": "Get a list of all patients.",
-            "parameters": {
-                "type": "object",
-                "properties": {}, # No parameters
-            },
+        "name": "get_patients_by_ids",
+        "description": "Get details of several patients by their IDs in one call. Prefer this over repeated get_patient_by_id calls.",
+        "method": "GET",
+        "path": "/patients/by-ids",
+        "parameters": {
+            "ids": {**IDS_PARAMETER, "description": "The IDs of the patients to look up"}
         },
+        "required": ["ids"],
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_all_doctors",
-            "description": "Get a list of all doctors.",
-            "parameters": {
-                "type": "object",
-                "properties": {}, # No parameters
-            },
+        "name": "get_all_patients",
+        "description": "Get a paginated list of patients. Supports filters and returning only selected fields. " + PAGE_RESULT_DESCRIPTION,
+        "method": "GET",
+        "path": "/patients",
+        "parameters": {
+            "name": {"type": "string", "description": "Filter by (partial) patient name"},
+            "gender": {"type": "string", "description": "Filter by gender"},
+            "diagnosis": {"type": "string", "description": "Filter by (partial) diagnosis"},
+            **PAGE_PARAMETERS,
         },
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_doctor_by_id",
-            "description": "Get doctor details by doctor ID.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "doctor_id": {"type": "integer", "description": "The ID of the doctor"}
-                },
-                "required": ["doctor_id"],
-            },
+        "name": "get_all_doctors",
+        "description": "Get a paginated list of doctors. Supports filters and returning only selected fields. " + PAGE_RESULT_DESCRIPTION,
+        "method": "GET",
+        "path": "/doctors",
+        "parameters": {
+            "doctor_name": {"type": "string", "description": "Filter by (partial) doctor name"},
+            "specialization": {"type": "string", "description": "Filter by (partial) specialization"},
+            "designation": {"type": "string", "description": "Filter by (partial) designation"},
+            "patient_id": {"type": "integer", "description": "Filter by patient ID"},
+            **PAGE_PARAMETERS,
         },
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_all_studies",
-            "description": "Get a list of all studies.",
-            "parameters": {
-                "type": "object",
-                "properties": {}, # No parameters
-            },
+        "name": "get_doctor_by_id",
+        "description": "Get doctor details by doctor ID.",
+        "method": "GET",
+        "path": "/doctor/{doctor_id}",
+        "parameters": {
+            "doctor_id": {"type": "integer", "description": "The ID of the doctor"}
         },
+        "required": ["doctor_id"],
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_study_by_id",
-            "description": "Get study details by study ID.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "study_id": {"type": "integer", "description": "The ID of the study"}
-                },
-                "required": ["study_id"],
-            },
+        "name": "get_doctors_by_ids",
+        "description": "Get details of several doctors by their IDs in one call. Prefer this over repeated get_doctor_by_id calls.",
+        "method": "GET",
+        "path": "/doctors/by-ids",
+        "parameters": {
+            "ids": {**IDS_PARAMETER, "description": "The IDs of the doctors to look up"}
         },
+        "required": ["ids"],
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_doctors_for_patient",
-            "description": "Get all doctors associated with a specific patient.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "patient_id": {"type": "integer", "description": "The ID of the patient"}
-                },
-                "required": ["patient_id"],
-            },
+        "name": "get_all_studies",
+        "description": "Get a paginated list of studies. Supports filters and returning only selected fields. " + PAGE_RESULT_DESCRIPTION,
+        "method": "GET",
+        "path": "/studies",
+        "parameters": {
+            "study_type": {"type": "string", "description": "Filter by (partial) study type, e.g. 'MRI'"},
+            "patient_id": {"type": "integer", "description": "Filter by patient ID"},
+            "doctor_id": {"type": "integer", "description": "Filter by doctor ID"},
+            **PAGE_PARAMETERS,
         },
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_studies_for_patient",
-            "description": "Get all studies for a specific patient.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "patient_id": {"type": "integer", "description": "The ID of the patient"}
-                },
-                "required": ["patient_id"],
-            },
+        "name": "get_study_by_id",
+        "description": "Get study details by study ID.",
+        "method": "GET",
+        "path": "/study/{study_id}",
+        "parameters": {
+            "study_id": {"type": "integer", "description": "The ID of the study"}
         },
+        "required": ["study_id"],
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_studies_for_doctor",
-            "description": "Get all studies conducted by a specific doctor.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "doctor_id": {"type": "integer", "description": "The ID of the doctor"}
-                },
-                "required": ["doctor_id"],
-            },
+        "name": "get_studies_by_ids",
+        "description": "Get details of several studies by their IDs in one call. Prefer this over repeated get_study_by_id calls.",
+        "method": "GET",
+        "path": "/studies/by-ids",
+        "parameters": {
+            "ids": {**IDS_PARAMETER, "description": "The IDs of the studies to look up"}
         },
+        "required": ["ids"],
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_employee_by_id",
-            "description": "Get employee details by employee ID from the session.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "employee_id": {"type": "integer", "description": "The ID of the employee"}
-                },
-                "required": ["employee_id"],
-            },
+        "name": "get_doctors_for_patient",
+        "description": "Get all doctors associated with a specific patient.",
+        "method": "GET",
+        "path": "/patient/{patient_id}/doctors",
+        "parameters": {
+            "patient_id": {"type": "integer", "description": "The ID of the patient"}
         },
+        "required": ["patient_id"],
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_all_employees",
-            "description": "Get a list of all employees.",
-            "parameters": {
-                "type": "object",
-                "properties": {}, # No parameters
-            },
+        "name": "get_studies_for_patient",
+        "description": "Get all studies for a specific patient.",
+        "method": "GET",
+        "path": "/patient/{patient_id}/studies",
+        "parameters": {
+            "patient_id": {"type": "integer", "description": "The ID of the patient"}
+        },
+        "required": ["patient_id"],
+    },
+    {
+        "name": "get_studies_for_doctor",
+        "description": "Get all studies conducted by a specific doctor.",
+        "method": "GET",
+        "path": "/doctor/{doctor_id}/studies",
+        "parameters": {
+            "doctor_id": {"type": "integer", "description": "The ID of the doctor"}
+        },
+        "required": ["doctor_id"],
+    },
+    {
+        "name": "get_patient_overview",
+        "description": "Get a patient's details together with all their doctors and studies in one call. Prefer this over separate patient/doctor/study lookups for the same patient.",
+        "method": "GET",
+        "path": "/patient/{patient_id}/overview",
+        "parameters": {
+            "patient_id": {"type": "integer", "description": "The ID of the patient"}
+        },
+        "required": ["patient_id"],
+    },
+    {
+        "name": "get_employee_by_id",
+        "description": "Get employee details by employee ID from the session.",
+        "method": "GET",
+        "path": "/employee/{employee_id}",
+        "parameters": {
+            "employee_id": {"type": "integer", "description": "The ID of the employee"}
+        },
+        "required": ["employee_id"],
+        "access": "self_or_admin",
+        "owner_param": "employee_id",
+    },
+    {
+        "name": "get_employees_by_ids",
+        "description": "Get details of several employees by their IDs in one call. Prefer this over repeated get_employee_by_id calls.",
+        "method": "GET",
+        "path": "/employees/by-ids",
+        "parameters": {
+            "ids": {**IDS_PARAMETER, "description": "The IDs of the employees to look up"}
+        },
+        "required": ["ids"],
+        "access": "self_or_admin",
+        "owner_param": "ids",
+    },
+    {
+        "name": "get_all_employees",
+        "description": "Get a paginated list of employees. Supports filters and returning only selected fields. " + PAGE_RESULT_DESCRIPTION,
+        "method": "GET",
+        "path": "/employees",
+        "parameters": {
+            "department": {"type": "string", "description": "Filter by (partial) department"},
+            "designation": {"type": "string", "description": "Filter by (partial) designation"},
+            "location": {"type": "string", "description": "Filter by (partial) location"},
+            "role": {"type": "string", "description": "Filter by role ('admin' or 'user')"},
+            **PAGE_PARAMETERS,
         },
     },
 ]
 
 
+def build_tools_spec(routes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Generate OpenAI function-calling tool specs from the tool table."""
+    specs = []
+    for route in routes:
+        parameters = {"type": "object", "properties": route.get("parameters", {})}
+        if route.get("required"):
+            parameters["required"] = list(route["required"])
+        specs.append({
+            "type": "function",
+            "function": {
+                "name": route["name"],
+                "description": route.get("description", ""),
+                "parameters": parameters,
+            },
+        })
+    return specs
+
+
+def routes_from_openapi(schema: Dict[str, Any], tag: str = "tools") -> List[Dict[str, Any]]:
+    """
+    Build tool table entries from a FastAPI OpenAPI schema.
+    Only GET operations tagged with `tag` are exposed; the operationId becomes the
+    tool name and the x-access / x-owner-param extensions carry access rules.
+    """
+    routes = []
+    for path, operations in schema.get("paths", {}).items():
+        op = operations.get("get")
+        if not op or tag not in op.get("tags", []):
+            continue
+
+        parameters, required = {}, []
+        for param in op.get("parameters", []):
+            if param.get("in") not in ("path", "query"):
+                continue
+            param_schema = dict(param.get("schema", {}))
+            # Optional query params are rendered by FastAPI as anyOf [T, null]
+            if "type" not in param_schema and param_schema.get("anyOf"):
+                param_schema.update(next((s for s in param_schema["anyOf"] if s.get("type") != "null"), {}))
+            prop = {k: v for k, v in param_schema.items() if k in ("type", "items", "enum", "minimum", "maximum")}
+            prop["description"] = param.get("description") or param_schema.get("title", param["name"])
+            parameters[param["name"]] = prop
+            if param.get("required"):
+                required.append(param["name"])
+
+        route = {
+            "name": op["operationId"],
+            "description": op.get("description") or op.get("summary", ""),
+            "method": "GET",
+            "path": path,
+            "parameters": parameters,
+            "required": required,
+        }
+        if op.get("x-access"):
+            route["access"] = op["x-access"]
+            route["owner_param"] = op.get("x-owner-param")
+        routes.append(route)
+    return routes
+
+
+def register_tools(routes: List[Dict[str, Any]]):
+    """Replace the active tool table. TOOLS_SPEC is updated in place so importers see the change."""
+    TOOL_ROUTES[:] = routes
+    TOOL_INDEX.clear()
+    TOOL_INDEX.update({route["name"]: route for route in routes})
+    TOOLS_SPEC[:] = build_tools_spec(routes)
+
+
+_openapi_tools_loaded = False
+
+
+async def load_tools_from_openapi(base_url: str = FASTAPI_BASE_URL, force: bool = False) -> bool:
+    """
+    Fetch the server's OpenAPI schema and register its tool routes.
+    Keeps the static table if the schema can't be fetched or exposes no tools.
+    """
+    global _openapi_tools_loaded
+    if _openapi_tools_loaded and not force:
+        return True
+    try:
+        response = await get_http_client().get(f"{base_url}/openapi.json")
+        response.raise_for_status()
+        routes = routes_from_openapi(response.json())
+    except (httpx.HTTPError, json.JSONDecodeError) as e:
+        print(f"Warning: could not load tools from OpenAPI schema, using static table: {e}")
+        return False
+    if not routes:
+        print("Warning: OpenAPI schema exposes no tool routes, using static table.")
+        return False
+    register_tools(routes)
+    _openapi_tools_loaded = True
+    return True
+
+
+# O(1) name -> route lookup used by the dispatcher
+TOOL_INDEX: Dict[str, Dict[str, Any]] = {route["name"]: route for route in TOOL_ROUTES}
+
+# OpenAI function-calling tool definitions generated from the table
+TOOLS_SPEC = build_tools_spec(TOOL_ROUTES)
+
+
+def _build_request(route: Dict[str, Any], function_args: Dict[str, Any], base_url: str) -> Tuple[str, Dict[str, Any]]:
+    """Resolve a tool call into (url, query params); raises ValueError for missing required args."""
+    for param in route.get("required", []):
+        if function_args.get(param) is None:
+            raise ValueError(f"{param} is required for {route['name']}")
+
+    path = route["path"]
+    query_params = {}
+    for name, value in function_args.items():
+        if name not in route.get("parameters", {}) or value is None:
+            continue
+        placeholder = "{" + name + "}"
+        if placeholder in path:
+            path = path.replace(placeholder, str(value))
+        else:
+            query_params[name] = value
+    return f"{base_url}{path}", query_params
+
+
+def _check_access(route: Dict[str, Any], function_args: Dict[str, Any], user_id: Optional[str], user_role: Optional[str]) -> Optional[Dict[str, str]]:
+    """Enforce role-based access: admins can access any record; users only their own. Returns an error dict or None."""
+    if route.get("access") != "self_or_admin" or user_role == 'admin':
+        return None
+
+    # If user_id not provided, deny
+    if user_id is None:
+        return {"error": "Access denied: missing user context"}
+    # Only allow access if requested id matches session user id
+    owner_value = function_args.get(route["owner_param"])
+    try:
+        # cast to int for comparison if possible
+        req_ids = [int(v) for v in owner_value] if isinstance(owner_value, list) else [int(owner_value)]
+        sess_id = int(user_id)
+    except Exception:
+        return {"error": "Invalid id format"}
+
+    if any(req_id != sess_id for req_id in req_ids):
+        return {"error": "Access denied: insufficient permissions"}
+    return None
+
+
+def _restrict_owner_ids(route: Dict[str, Any], function_args: Dict[str, Any], user_id: Optional[str], user_role: Optional[str]) -> Tuple[Dict[str, Any], List[Any]]:
+    """
+    Per-id access for bulk lookups: drop the ids of a list-valued owner_param that a
+    non-admin user may not read. Returns (args, denied ids); _check_access still runs
+    on the result, so a request with no permitted ids is denied as a whole.
+    """
+    owner_value = function_args.get(route.get("owner_param"))
+    if route.get("access") != "self_or_admin" or user_role == 'admin' or not isinstance(owner_value, list):
+        return function_args, []
+    allowed = [v for v in owner_value if str(v) == str(user_id)]
+    if not allowed:
+        return function_args, []
+    denied = [v for v in owner_value if str(v) != str(user_id)]
+    return {**function_args, route["owner_param"]: allowed}, denied
+
+
+def invalidate_tool_cache(prefixes: Optional[List[str]] = None, base_url: str = FASTAPI_BASE_URL) -> int:
+    """
+    Drop cached tool responses after a write, so the next read goes to the server.
+
+    Args:
+        prefixes: Route path prefixes to drop (e.g. ["/employee"]); everything under base_url if None
+        base_url: Server the responses were cached for
+
+    Returns:
+        Number of cached responses removed
+    """
+    return sum(tool_response_cache.invalidate(f"{base_url}{prefix}") for prefix in (prefixes or [""]))
+
+
 # --- Custom Tool Execution Function ---
 async def call_fastapi_tool(tool_call, base_url: str = FASTAPI_BASE_URL, user_id: Optional[str] = None, user_role: Optional[str] = None):
     """
     Executes a FastAPI tool based on the OpenAI tool call object.
-    Uses httpx for async HTTP requests.
+    The tool is resolved through TOOL_INDEX and sent with the shared pooled httpx client.
     """
     function_name = tool_call.function.name
     function_args = json.loads(tool_call.function.arguments)
 
     url = ""
-    method = "GET"
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            if function_name == "get_patient_by_id":
-                patient_id = function_args.get("patient_id")
-                if patient_id is None:
-                    raise ValueError("patient_id is required for get_patient_by_id")
-                url = f"{base_url}/patient/{patient_id}"
-                response = await client.get(url)
-
-            elif function_name == "get_employee_by_id":
-                employee_id = function_args.get("employee_id")
-                if employee_id is None:
-                    raise ValueError("employee_id is required for get_employee_by_id")
-
-                # Enforce role-based access: admins can access any employee; users only their own
-                if user_role != 'admin':
-                    # If user_id not provided, deny
-                    if user_id is None:
-                        return {"error": "Access denied: missing user context"}
-                    # Only allow access if requested id matches session user id
-                    try:
-                        # cast to int for comparison if possible
-                        req_id = int(employee_id)
-                        sess_id = int(user_id)
-                    except Exception:
-                        return {"error": "Invalid id format"}
-
-                    if req_id != sess_id:
-                        return {"error": "Access denied: insufficient permissions"}
-
-                url = f"{base_url}/employee/{employee_id}"
-                response = await client.get(url)
-
-            elif function_name == "get_all_patients":
-                url = f"{base_url}/patients"
-                response = await client.get(url)
-
-            elif function_name == "get_all_doctors":
-                url = f"{base_url}/doctors"
-                response = await client.get(url)
-
-            elif function_name == "get_doctor_by_id":
-                doctor_id = function_args.get("doctor_id")
-                if doctor_id is None:
-                    raise ValueError("doctor_id is required for get_doctor_by_id")
-                url = f"{base_url}/doctor/{doctor_id}"
-                response = await client.get(url)
-
-            elif function_name == "get_all_studies":
-                url = f"{base_url}/studies"
-                response = await client.get(url)
-
-            elif function_name == "get_study_by_id":
-                study_id = function_args.get("study_id")
-                if study_id is None:
-                    raise ValueError("study_id is required for get_study_by_id")
-                url = f"{base_url}/study/{study_id}"
-                response = await client.get(url)
-
-            elif function_name == "get_doctors_for_patient":
-                patient_id = function_args.get("patient_id")
-                if patient_id is None:
-                    raise ValueError("patient_id is required for get_doctors_for_patient")
-                url = f"{base_url}/patient/{patient_id}/doctors"
-                response = await client.get(url)
-
-            elif function_name == "get_studies_for_patient":
-                patient_id = function_args.get("patient_id")
-                if patient_id is None:
-                    raise ValueError("patient_id is required for get_studies_for_patient")
-                url = f"{base_url}/patient/{patient_id}/studies"
-                response = await client.get(url)
-
-            elif function_name == "get_studies_for_doctor":
-                doctor_id = function_args.get("doctor_id")
-                if doctor_id is None:
-                    raise ValueError("doctor_id is required for get_studies_for_doctor")
-                url = f"{base_url}/doctor/{doctor_id}/studies"
-                response = await client.get(url)
-
-            elif function_name == "get_all_employees":
-                url = f"{base_url}/employees"
-                response = await client.get(url)
+    client = get_http_client()
 
-            else:
-                return {"error": f"Unknown function: {function_name}"}
+    try:
+        route = TOOL_INDEX.get(function_name)
+        if route is None:
+            return {"error": f"Unknown function: {function_name}"}
+
+        function_args, denied_ids = _restrict_owner_ids(route, function_args, user_id, user_role)
+        url, query_params = _build_request(route, function_args, base_url)
+
+        denied = _check_access(route, function_args, user_id, user_role)
+        if denied:
+            return denied
+
+        # Access is checked before the cache lookup, so cached data never bypasses it
+        method = route.get("method", "GET")
+        cache_key = ResponseCache.make_key(url, query_params) if method == "GET" else None
+        result = tool_response_cache.get(cache_key) if cache_key else None
+        if result is None:
+            response = await client.request(method, url, params=query_params or None)
 
             response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
-            return response.json()
-
-        except httpx.HTTPStatusError as e:
-            return {
-                "error": f"HTTP error occurred: {e.response.status_code}",
-                "detail": e.response.text,
-                "function_name": function_name,
-                "url": url
-            }
-        except httpx.RequestError as e:
-            return {
-                "error": f"HTTP Request failed: {str(e)}",
-                "function_name": function_name,
-                "url": url
-            }
-        except json.JSONDecodeError as e:
-            return {
-                "error": f"Failed to decode JSON from response",
-                "detail": str(e),
-                "function_name": function_name,
-                "url": url
-            }
-        except ValueError as e:
-            return {
-                "error": str(e),
-                "function_name": function_name,
-                "args": function_args
-            }
-        except Exception as e:
-            return {
-                "error": f"An unexpected error occurred: {str(e)}",
-                "function_name": function_name,
-                "url": url
-            }
\ No newline at end of file
+            result = response.json()
+            if cache_key:
+                tool_response_cache.set(cache_key, result)
+            else:
+                # A write: cached reads of what it changed are now stale
+                invalidate_tool_cache(route.get("invalidates"), base_url)
+
+        if denied_ids and isinstance(result, dict):
+            # Report ids dropped by the per-id access check (not cached: the cache key only covers permitted ids)
+            result = {**result, "denied_ids": denied_ids}
+        return result
+
+    except httpx.HTTPStatusError as e:
+        return {
+            "error": f"HTTP error occurred: {e.response.status_code}",
+            "detail": e.response.text,
+            "function_name": function_name,
+            "url": url
+        }
+    except httpx.RequestError as e:
+        return {
+            "error": f"HTTP Request failed: {str(e)}",
+            "function_name": function_name,
+            "url": url
+        }
+    except json.JSONDecodeError as e:
+        return {
+            "error": f"Failed to decode JSON from response",
+            "detail": str(e),
+            "function_name": function_name,
+            "url": url
+        }
+    except ValueError as e:
+        return {
+            "error": str(e),
+            "function_name": function_name,
+            "args": function_args
+        }
+    except Exception as e:
+        return {
+            "error": f"An unexpected error occurred: {str(e)}",
+            "function_name": function_name,
+            "url": url
+        }
\ No newline at end of file
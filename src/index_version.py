@@ -0,0 +1,127 @@
+"""
+Monotonic version of the document corpus / search index.
+
+The upload server (src/server/main.py) bumps it whenever blobs or index
+documents change, and local ingests (pdf_ingest.py) do the same. Caches whose
+contents depend on the index (the orchestrator's answer cache) include the
+version in their keys, so a change makes old entries unreachable without a
+manual flush.
+
+The version is persisted to INDEX_VERSION_FILE as
+{"version": n, "updated_at": ..., "reason": ...}. Clients read it through
+GET /index-version with a short TTL, falling back to the file when the server
+is unreachable.
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import httpx
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+INDEX_VERSION_FILE = os.getenv("INDEX_VERSION_FILE", os.path.join(ROOT_DIR, "data", "index_version.json"))
+# Empty INDEX_VERSION_URL reads the version file directly
+INDEX_VERSION_URL = os.getenv("INDEX_VERSION_URL", "http://localhost:8000/index-version")
+INDEX_VERSION_TTL = float(os.getenv("INDEX_VERSION_TTL", "5"))
+INDEX_VERSION_TIMEOUT = float(os.getenv("INDEX_VERSION_TIMEOUT", "2"))
+# The Azure indexer runs asynchronously after a bump; caches should not store results this soon after a change
+INDEX_SETTLE_SECONDS = float(os.getenv("INDEX_SETTLE_SECONDS", "120"))
+
+_file_lock = threading.Lock()
+
+
+def read_index_version(path: str = INDEX_VERSION_FILE) -> Dict[str, Any]:
+    """
+    Read the persisted index version.
+
+    Returns:
+        Dict with 'version' (0 if never bumped) and 'updated_at'
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return {"version": int(data.get("version", 0)), "updated_at": data.get("updated_at")}
+    except FileNotFoundError:
+        return {"version": 0, "updated_at": None}
+    except (OSError, ValueError) as e:
+        print(f"[Index Version] Could not read {path}: {e}")
+        return {"version": 0, "updated_at": None}
+
+
+def bump_index_version(reason: str, path: str = INDEX_VERSION_FILE) -> Dict[str, Any]:
+    """
+    Increment the persisted index version (atomic file replace).
+
+    Args:
+        reason: Short description of the change, e.g. "upload:report.pdf"
+        path: Version file
+
+    Returns:
+        The new version record
+    """
+    with _file_lock:
+        record = {
+            "version": read_index_version(path)["version"] + 1,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "reason": reason,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+    print(f"[Index Version] {record['version']} ({reason})")
+    return record
+
+
+class IndexVersionFetcher:
+    """Current index version as seen by a client, refreshed at most every `ttl` seconds."""
+
+    def __init__(self, url: Optional[str] = INDEX_VERSION_URL, ttl: float = INDEX_VERSION_TTL, path: str = INDEX_VERSION_FILE):
+        self.url = url
+        self.ttl = ttl
+        self.path = path
+        self._version: Optional[int] = None
+        self.updated_at: Optional[str] = None
+        self._fetched_at = 0.0
+
+    async def _fetch(self) -> Dict[str, Any]:
+        if self.url:
+            try:
+                async with httpx.AsyncClient(timeout=INDEX_VERSION_TIMEOUT) as client:
+                    response = await client.get(self.url)
+                    response.raise_for_status()
+                    data = response.json()
+                    return {"version": int(data["version"]), "updated_at": data.get("updated_at")}
+            except (httpx.HTTPError, KeyError, ValueError) as e:
+                print(f"[Index Version] {self.url} unavailable, reading {self.path}: {e}")
+        return read_index_version(self.path)
+
+    async def get(self) -> int:
+        """Cached index version; fetched again once the TTL has passed."""
+        if self._version is None or time.monotonic() - self._fetched_at >= self.ttl:
+            record = await self._fetch()
+            self._version, self.updated_at = record["version"], record["updated_at"]
+            self._fetched_at = time.monotonic()
+        return self._version
+
+    def settled(self, seconds: float = INDEX_SETTLE_SECONDS) -> bool:
+        """True if the last known change is older than `seconds` (or the index never changed)."""
+        if not self.updated_at:
+            return True
+        try:
+            changed = datetime.fromisoformat(self.updated_at)
+        except ValueError:
+            return True
+        return (datetime.now(timezone.utc) - changed).total_seconds() >= seconds
+
+    def invalidate(self):
+        """Force the next get() to fetch (e.g. right after this process changed the index)."""
+        self._fetched_at = 0.0
+
+
+index_version = IndexVersionFetcher()
@@ -2,11 +2,17 @@
 import streamlit as st
 import hashlib
 import json
-import os
+import os, sys
 from datetime import datetime, timedelta
 import time
 import requests
 
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.clients.mcp_client import invalidate_tool_cache
+
 # Page config
 st.set_page_config(
     page_title="AI Chatbot - Login", 
@@ -41,6 +47,8 @@ def register_user(username: str, email: str, password: str,  doj:datetime, desig
             params={"username": username, "email": email, "password": password,  "doj": str(doj),"designation": designation,"department": department,"location": location}
         )
         if response.status_code == 200:
+            # The chat's cached employee lookups no longer match the server
+            invalidate_tool_cache(["/employee"])
             return True, response.json().get("message", "Registration successful!")
         else:
             return False, response.json().get("detail", "Registration failed!")
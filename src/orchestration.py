@@ -3,9 +3,11 @@ import os, sys
 import json
 import time
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI
+from openai.types.chat import ChatCompletionMessageFunctionToolCall
+from openai.types.chat.chat_completion_message_function_tool_call import Function
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
@@ -17,8 +19,13 @@ ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
  
-from src.adapters.rag_chat import retrieve_context, build_context_text, ask_llm, get_unique_sources, format_sources_list
-from src.clients.mcp_client import TOOLS_SPEC, call_fastapi_tool
+from src.adapters.rag_chat import build_context, get_unique_sources, format_sources_list, embedding_cache, reranker, refresh_vector_store, USE_AZURE_SEARCH
+from src.adapters import rag_chat_async
+from src.adapters.context_budget import count_tokens, format_chunks
+from src.adapters.dedup import NearDuplicateFilter
+from src.answer_cache import SemanticAnswerCache
+from src.index_version import index_version
+from src.clients.mcp_client import TOOLS_SPEC, MCP_TOOLS_FROM_OPENAPI, call_fastapi_tool, load_tools_from_openapi, startup_http_client, shutdown_http_client, tool_response_cache
  
 # Import QnT metrics
 try:
@@ -43,6 +50,24 @@ AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
 AZURE_OPENAI_CHAT_MODEL = os.getenv("AZURE_OPENAI_CHAT_MODEL")
 AZURE_OPENAI_EMBED_MODEL = os.getenv("AZURE_OPENAI_EMBED_MODEL")
+
+# Per-call timeout (seconds) for tool calls dispatched concurrently within one model turn
+ORCH_TOOL_TIMEOUT = float(os.getenv("ORCH_TOOL_TIMEOUT", "60"))
+# Maximum MCP (FastAPI) tool calls in flight for one model response
+MCP_MAX_CONCURRENCY = int(os.getenv("MCP_MAX_CONCURRENCY", "4"))
+
+# Semantic answer cache (see src/answer_cache.py). Follow-up turns depend on the
+# conversation, so by default only turns without history are cached.
+ANSWER_CACHE_WITH_HISTORY = os.getenv("ANSWER_CACHE_WITH_HISTORY", "false").lower() in ("1", "true", "yes")
+answer_cache = SemanticAnswerCache()
+
+# "reuse": the answer is the first tool-free response of the tool loop (streamed as it is generated);
+# "always": one more completion without tools synthesizes the answer after the loop
+ORCH_FINAL_SYNTHESIS = os.getenv("ORCH_FINAL_SYNTHESIS", "reuse").lower()
+
+# search_documents output: "answer" runs ask_llm over the retrieved chunks and returns its answer;
+# "retrieval" returns the ranked chunks to the orchestrator, which answers from them directly
+RAG_SEARCH_MODE = os.getenv("RAG_SEARCH_MODE", "answer").lower()
  
 class PipelineResult(BaseModel):
     answer: str
@@ -51,7 +76,17 @@ class PipelineResult(BaseModel):
     debug: Optional[Dict[str, Any]] = {}
     latency_ms: Optional[int] = None
     qnt_metrics: Optional[Dict[str, Any]] = None  # Added QnT metrics
- 
+
+
+def _tool_call_query(tc) -> str:
+    """The 'query' argument of a tool call, for progress events."""
+    try:
+        args = json.loads(tc.function.arguments) if isinstance(tc.function.arguments, str) else tc.function.arguments
+    except json.JSONDecodeError:
+        return ""
+    return args.get("query", "") if isinstance(args, dict) else ""
+
+
 class LangChainOrchestrator:
     def __init__(self):
         # Initialize Azure OpenAI client for agent with tool-calling
@@ -60,6 +95,8 @@ class LangChainOrchestrator:
             azure_endpoint=AZURE_OPENAI_ENDPOINT,
             api_version=AZURE_OPENAI_API_VERSION
         )
+        self._async_agent_client = None
+        self._async_agent_loop = None
        
         self.embeddings = AzureOpenAIEmbeddings(
             azure_deployment=AZURE_OPENAI_EMBED_MODEL,
@@ -114,18 +151,106 @@ class LangChainOrchestrator:
             }
         ]
    
-    async def _execute_rag_pipeline(self, query: str, top_k: int = 5) -> Dict[str, Any]:
+    async def startup(self):
+        """Open the pooled HTTP client used for healthcare tool calls on the current event loop."""
+        await startup_http_client()
+        if MCP_TOOLS_FROM_OPENAPI:
+            await load_tools_from_openapi()
+   
+    async def shutdown(self):
+        """Close the pooled clients opened on the current event loop."""
+        await shutdown_http_client()
+        await rag_chat_async.close_clients()
+        if self._async_agent_client is not None and self._async_agent_loop is asyncio.get_running_loop():
+            await self._async_agent_client.close()
+        self._async_agent_client = None
+        self._async_agent_loop = None
+   
+    def _get_async_agent_client(self) -> AsyncAzureOpenAI:
+        """
+        Async client for the agent's chat completions, so concurrent tool calls
+        don't block each other. Bound to the event loop it was created on and
+        recreated if called from another one (e.g. separate asyncio.run() calls).
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_agent_client is None or self._async_agent_loop is not loop:
+            self._async_agent_client = AsyncAzureOpenAI(
+                api_key=AZURE_OPENAI_API_KEY,
+                azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                api_version=AZURE_OPENAI_API_VERSION
+            )
+            self._async_agent_loop = loop
+        return self._async_agent_client
+   
+    async def _prefetch_document_chunks(self, tool_calls, default_top_k: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieve chunks for all search_documents calls of one model turn together,
+        so their queries share a single batched embeddings request.
+        Returns a mapping of tool_call id -> chunks.
+        """
+        searches = []
+        for tc in tool_calls:
+            if tc.function.name != "search_documents":
+                continue
+            try:
+                args = json.loads(tc.function.arguments) if isinstance(tc.function.arguments, str) else tc.function.arguments
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(args, dict):
+                continue # Valid JSON but not an object (e.g. a bare string); the tool call itself handles it
+            searches.append((tc.id, args.get("query", ""), args.get("top_k", default_top_k)))
+       
+        if len(searches) < 2:
+            return {}
+       
+        # Group by top_k so each group can be served by one retrieve_context_many call
+        groups: Dict[int, List] = {}
+        for tc_id, q, k in searches:
+            groups.setdefault(k, []).append((tc_id, q))
+       
+        prefetched = {}
+        try:
+            for k, items in groups.items():
+                results = await rag_chat_async.retrieve_context_many([q for _, q in items], k=k)
+                for (tc_id, _), chunks in zip(items, results):
+                    prefetched[tc_id] = chunks
+            print(f"[Orchestrator] Prefetched document chunks for {len(prefetched)} searches")
+        except Exception as e:
+            print(f"[Orchestrator] Batched retrieval failed, falling back to per-call search: {e}")
+            return {}
+        return prefetched
+   
+    async def _execute_rag_pipeline(self, query: str, top_k: int = 5, chunks: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """Execute RAG pipeline - similar to rag_chatbot"""
+        started = time.time()
         try:
             print(f"\n[RAG Pipeline] Searching documents for: {query}")
-            chunks = retrieve_context(query, k=top_k)
-            context_text = build_context_text(chunks)
+            if chunks is None:
+                chunks = await rag_chat_async.retrieve_context(query, k=top_k)
+            # Deduplicated and trimmed to CONTEXT_MAX_TOKENS; only the chunks that made it in are passed on.
+            # Token counting and MinHash are CPU work, kept off the event loop shared by all sessions
+            context_text, chunks, context_stats = await asyncio.to_thread(build_context, chunks)
+
+            if RAG_SEARCH_MODE == "retrieval":
+                # No nested ask_llm: the orchestrator reads the chunks once and answers from them
+                return {
+                    "success": True,
+                    "answer": None,
+                    "sources": chunks,
+                    "identified_sources": get_unique_sources(chunks),
+                    "num_chunks": len(chunks),
+                    "context_text": context_text,
+                    "context_stats": context_stats,
+                    "mode": "retrieval",
+                    "latency_ms": int((time.time() - started) * 1000),
+                    "llm_calls": 0
+                }
            
             # Get answer from LLM with context - pass chunks for source formatting
             # Note: For sub-queries, we might want a simpler answer without full source formatting here,
             # and let the orchestrator format the final sources.
             # However, for consistency, we'll keep ask_llm's full behavior.
-            answer = ask_llm(query, context_text, [], chunks)
+            answer = await rag_chat_async.ask_llm(query, context_text, [], chunks)
            
             # Extract just the answer part if ask_llm adds source formatting.
             # The orchestrator will handle final source aggregation.
@@ -155,7 +280,11 @@ class LangChainOrchestrator:
                 "sources": chunks, # Raw chunks for source processing by orchestrator
                 "identified_sources": rag_sources_extracted, # Sources identified by RAG LLM
                 "num_chunks": len(chunks),
-                "context_text": context_text
+                "context_text": context_text,
+                "context_stats": context_stats,
+                "mode": "answer",
+                "latency_ms": int((time.time() - started) * 1000),
+                "llm_calls": 1
             }
         except Exception as e:
             print(f"[RAG Pipeline Error] {str(e)}")
@@ -197,7 +326,7 @@ class LangChainOrchestrator:
             tools_called = []
            
             # Step 1: Send query to model with MCP tools
-            response = self.agent_client.chat.completions.create(
+            response = await self._get_async_agent_client().chat.completions.create(
                 model=AZURE_OPENAI_CHAT_MODEL,
                 messages=messages,
                 tools=TOOLS_SPEC,  # Use MCP tools from mcp_client
@@ -212,18 +341,25 @@ class LangChainOrchestrator:
                 print(f"[MCP Pipeline] Tool calls detected: {len(tool_calls)}")
                 messages.append(response_message)
                
-                for tool_call in tool_calls:
+                # Run the tool calls of this response concurrently (bounded), then merge in order
+                semaphore = asyncio.Semaphore(max(1, MCP_MAX_CONCURRENCY))
+               
+                async def _bounded_call(tool_call):
+                    async with semaphore:
+                        print(f"[MCP Pipeline] Executing tool: {tool_call.function.name}")
+                        # Execute the tool and pass user context to enforce access control
+                        return await call_fastapi_tool(tool_call, user_id=user_id, user_role=user_role)
+               
+                tool_outputs = await asyncio.gather(*(_bounded_call(tc) for tc in tool_calls))
+               
+                for tool_call, tool_output in zip(tool_calls, tool_outputs):
                     func_name = tool_call.function.name
-                    print(f"[MCP Pipeline] Executing tool: {func_name}")
                    
                     try:
                         args = json.loads(tool_call.function.arguments) if isinstance(tool_call.function.arguments, str) else tool_call.function.arguments
                     except json.JSONDecodeError:
                         args = tool_call.function.arguments # Keep as string if not valid JSON
                    
-                    # Execute the tool and pass user context to enforce access control
-                    tool_output = await call_fastapi_tool(tool_call, user_id=user_id, user_role=user_role)
-                   
                     tools_called.append({
                         "name": func_name,
                         "args": args,
@@ -240,7 +376,7 @@ class LangChainOrchestrator:
                     })
                
                 # Step 3: Get final response after tool execution
-                final_response = self.agent_client.chat.completions.create(
+                final_response = await self._get_async_agent_client().chat.completions.create(
                     model=AZURE_OPENAI_CHAT_MODEL,
                     messages=messages,
                 )
@@ -252,7 +388,8 @@ class LangChainOrchestrator:
             return {
                 "success": True,
                 "answer": final_answer,
-                "tools_called": tools_called
+                "tools_called": tools_called,
+                "llm_calls": 2 if tool_calls else 1
             }
            
         except Exception as e:
@@ -264,15 +401,220 @@ class LangChainOrchestrator:
                 "tools_called": []
             }
  
+    async def _run_orchestrator_tool(self, tc, top_k: int, user_id: Optional[str], user_role: Optional[str], prefetch: Optional[asyncio.Task] = None):
+        """
+        Execute a single orchestrator tool call with a timeout.
+        Document searches wait for the turn's batched `prefetch` task inside that
+        timeout; other tools start immediately.
+        Returns (func_name, args, result) where result is the pipeline result dict
+        (None for unknown tools).
+        """
+        func_name = tc.function.name
+        print(f"[Orchestrator] Routing to: {func_name}")
+       
+        try:
+            args = json.loads(tc.function.arguments) if isinstance(tc.function.arguments, str) else tc.function.arguments
+        except json.JSONDecodeError:
+            args = tc.function.arguments # Keep as string if not valid JSON
+        if not isinstance(args, dict):
+            args = {}
+       
+        if func_name == "search_documents":
+            async def search():
+                # Shielded: one search timing out must not cancel the prefetch the others share
+                prefetched_chunks = await asyncio.shield(prefetch) if prefetch else {}
+                return await self._execute_rag_pipeline(
+                    query=args.get("query", ""), # Ensure query is passed
+                    top_k=args.get("top_k", top_k),
+                    chunks=prefetched_chunks.get(tc.id)
+                )
+            call = search()
+            failure = {"answer": "Failed to search documents.", "sources": [], "identified_sources": [], "context_text": ""}
+        elif func_name == "query_healthcare_system":
+            call = self._execute_mcp_pipeline(
+                query=args.get("query", ""), # Ensure query is passed
+                history=[], # Don't pass history to sub-pipeline, orchestrator manages overall
+                user_id=user_id,
+                user_role=user_role
+            )
+            failure = {"answer": "Failed to process healthcare query.", "tools_called": []}
+        else:
+            return func_name, args, None
+       
+        try:
+            result = await asyncio.wait_for(call, timeout=ORCH_TOOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"[Orchestrator] Tool {func_name} timed out after {ORCH_TOOL_TIMEOUT}s")
+            result = {"success": False, "error": f"{func_name} timed out after {ORCH_TOOL_TIMEOUT}s", **failure}
+        return func_name, args, result
+ 
+    async def _create_agent_completion(self, messages: List[Dict[str, Any]], stream: bool = False):
+        """Request one tool-enabled orchestrator completion (an AsyncStream when `stream`)."""
+        return await self._get_async_agent_client().chat.completions.create(
+            model=AZURE_OPENAI_CHAT_MODEL,
+            messages=messages,
+            tools=self.orchestrator_tools,
+            tool_choice="auto", # Allow the model to decide if it needs a tool
+            **({"stream": True} if stream else {}),
+        )
+
+    async def _stream_agent_response(self, messages: List[Dict[str, Any]], stream=None):
+        """
+        Stream one tool-enabled orchestrator completion.
+
+        Yields ("token", text) for answer content as it arrives, then
+        ("message", content, tool_calls) once the response is complete, with the
+        tool calls reassembled from their streamed fragments.
+
+        Args:
+            messages: Conversation so far
+            stream: Completion stream already requested for these messages, if any
+        """
+        if stream is None:
+            stream = await self._create_agent_completion(messages, stream=True)
+        content_parts = []
+        calls: Dict[int, Dict[str, str]] = {}
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content_parts.append(delta.content)
+                yield "token", delta.content
+            for part in delta.tool_calls or []:
+                call = calls.setdefault(part.index, {"id": "", "name": "", "arguments": ""})
+                if part.id:
+                    call["id"] = part.id
+                if part.function:
+                    call["name"] += part.function.name or ""
+                    call["arguments"] += part.function.arguments or ""
+        tool_calls = [
+            ChatCompletionMessageFunctionToolCall(id=c["id"], type="function", function=Function(name=c["name"], arguments=c["arguments"]))
+            for _, c in sorted(calls.items())
+        ]
+        yield "message", "".join(content_parts), tool_calls
+
+    async def _lookup_cached_answer(self, query: str, scope) -> tuple:
+        """
+        Look up a cached answer for the query by embedding similarity.
+
+        Returns:
+            ((cached PipelineResult, similarity) or None, query embedding or None)
+        """
+        try:
+            qvec = await rag_chat_async.embed_query(query)
+        except Exception as e:
+            print(f"[Orchestrator] Answer cache embedding failed: {e}")
+            return None, None
+        return answer_cache.lookup(query, qvec, scope), qvec
+
+    @staticmethod
+    def _cached_result(cached: PipelineResult, similarity: float, start: float) -> PipelineResult:
+        """
+        Copy of a cached answer with this turn's debug info and latency.
+        The stored turn's executions (rag_executions, tools used, its timings) are kept
+        under debug["cached_from"]; nothing ran this turn, so tools_used is empty.
+        """
+        print(f"[Orchestrator] Answer cache hit (similarity {similarity:.3f})")
+        result = cached.model_copy(deep=True)
+        # Cache and reranker counters are snapshots; report the current ones instead
+        original = {k: v for k, v in (result.debug or {}).items()
+                    if k not in ("embedding_cache", "reranker", "tool_response_cache", "answer_cache")}
+        elapsed_ms = int((time.time() - start) * 1000)
+        result.debug = {
+            "cached": True,
+            "cache_similarity": round(similarity, 4),
+            "cached_latency_ms": cached.latency_ms,
+            "cached_from": {**original, "tools_used": cached.tools_used},
+            "tool_calls_made": 0,
+            "direct_response": False,
+            "first_token_ms": elapsed_ms, # The whole answer is sent as the first token
+            "llm_calls": 0,
+            "final_synthesis": ORCH_FINAL_SYNTHESIS,
+            "rag_search_mode": RAG_SEARCH_MODE,
+            "embedding_cache": embedding_cache.stats(),
+            "reranker": reranker.stats(),
+            "tool_response_cache": tool_response_cache.stats(),
+            "answer_cache": answer_cache.stats(),
+        }
+        result.tools_used = []
+        result.latency_ms = elapsed_ms
+        return result
+
+    @staticmethod
+    async def _discard_completion(task: asyncio.Task):
+        """Cancel a completion request that is no longer needed, closing its stream if it already opened."""
+        task.cancel()
+        try:
+            response = await task
+        except (asyncio.CancelledError, Exception):
+            return
+        if hasattr(response, "close"):
+            await response.close()
+
     async def process_query(self, query: str, history: List[Dict[str, str]], user_id: Optional[str] = None, user_role: Optional[str] = None, top_k: int = 5, uploaded_pdf_path: Optional[str] = None, enable_qnt: bool = True) -> PipelineResult:
+        """Run one chat turn and return the complete result (see process_query_stream)."""
+        result = None
+        async for event in self.process_query_stream(query, history, user_id=user_id, user_role=user_role, top_k=top_k, uploaded_pdf_path=uploaded_pdf_path, enable_qnt=enable_qnt):
+            if event["type"] == "result":
+                result = event["result"]
+        return result
+
+    async def process_query_stream(self, query: str, history: List[Dict[str, str]], user_id: Optional[str] = None, user_role: Optional[str] = None, top_k: int = 5, uploaded_pdf_path: Optional[str] = None, enable_qnt: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run one chat turn, yielding progress events as they happen.
+
+        Events (dicts with a 'type' key):
+            tool_start: {"iteration", "tools": [{"name", "query"}]} when the model calls tools
+            tool_end: {"name", "query", "success"} as each tool call finishes
+            token: {"content"} pieces of the final answer, streamed from the model
+            result: {"result": PipelineResult}, always the last event
+
+        Args:
+            query: User message
+            history: Previous messages of the conversation
+            user_id: Logged-in user id, passed to healthcare tools
+            user_role: Logged-in user role
+            top_k: Chunks per document search
+            uploaded_pdf_path: PDF uploaded for this turn, if any
+            enable_qnt: Calculate QnT metrics for document answers
+        """
         start = time.time()
 
+        # Paraphrases of a document question reuse the stored answer (scoped by role and index version).
+        # The exact text is checked right away; the embedding lookup is only needed when the scope has
+        # entries, and then runs alongside the first completion (see below).
+        use_answer_cache = answer_cache.enabled and not uploaded_pdf_path and (ANSWER_CACHE_WITH_HISTORY or not history)
+        query_vector = None
+        cache_lookup = None
+        if use_answer_cache or not USE_AZURE_SEARCH:
+            # One version read keys the answer cache and reloads the local store after an ingest,
+            # so answers cached under a new version always come from the new store
+            current_version = await index_version.get()
+            await asyncio.to_thread(refresh_vector_store, current_version)
+        if use_answer_cache:
+            cache_scope = (user_role or "user", current_version)
+            cached = answer_cache.lookup_text(query, cache_scope)
+            if cached is not None:
+                result = self._cached_result(cached, 1.0, start)
+                yield {"type": "token", "content": result.answer}
+                yield {"type": "result", "result": result}
+                return
+            if answer_cache.has_entries(cache_scope):
+                cache_lookup = asyncio.create_task(self._lookup_cached_answer(query, cache_scope))
+
         # Initialize lists to accumulate results
         all_tools_used = []
         all_sources_for_ui = [] # For displaying individual chunks and their sources
         all_unique_final_sources = set() # For the final formatted sources list
         all_debug_info = {}
         all_context_texts = [] # For QnT evaluation
+        # Chunks already collected this turn: searches often return the same or overlapping passages
+        turn_chunks = NearDuplicateFilter()
+        first_token_ms = None
+        llm_calls = 0 # Chat completions of this turn, including those made inside tools
+        final_answer_raw = None
+        first_completion = None # First agent completion, requested early when an answer-cache lookup runs
 
         try:
             # Build conversation messages for orchestrator
@@ -322,62 +664,127 @@ class LangChainOrchestrator:
             messages.append({"role": "user", "content": query})
            
             print(f"\n[Orchestrator] Processing query: {query}")
+
+            # First completion is requested while the cache embedding is in flight; the loser is discarded
+            if cache_lookup is not None:
+                first_completion = asyncio.create_task(
+                    self._create_agent_completion(messages, stream=ORCH_FINAL_SYNTHESIS == "reuse")
+                )
+                hit, query_vector = await cache_lookup
+                if hit is not None:
+                    await self._discard_completion(first_completion)
+                    result = self._cached_result(*hit, start)
+                    yield {"type": "token", "content": result.answer}
+                    yield {"type": "result", "result": result}
+                    return
            
             # Orchestrator Loop for multi-tool execution
             max_tool_iterations = 5 # Limit to prevent infinite loops
            
             for i in range(max_tool_iterations):
-                response = self.agent_client.chat.completions.create(
-                    model=AZURE_OPENAI_CHAT_MODEL,
-                    messages=messages,
-                    tools=self.orchestrator_tools,
-                    tool_choice="auto", # Allow the model to decide if it needs a tool
-                )
-               
-                response_message = response.choices[0].message
-                tool_calls = getattr(response_message, "tool_calls", None)
+                llm_calls += 1
+                if ORCH_FINAL_SYNTHESIS == "reuse":
+                    # Content is streamed right away: a response without tool calls is the final answer
+                    opened = await first_completion if i == 0 and first_completion is not None else None
+                    async for kind, *payload in self._stream_agent_response(messages, opened):
+                        if kind == "token":
+                            if first_token_ms is None:
+                                first_token_ms = int((time.time() - start) * 1000)
+                            yield {"type": "token", "content": payload[0]}
+                        else:
+                            content, tool_calls = payload
+                    response_message = {"role": "assistant", "content": content or None}
+                    if tool_calls:
+                        response_message["tool_calls"] = [tc.model_dump() for tc in tool_calls]
+                        if content:
+                            # Text before tool calls stays on screen; start the answer on a new paragraph
+                            yield {"type": "token", "content": "\n\n"}
+                    else:
+                        final_answer_raw = content
+                else:
+                    if i == 0 and first_completion is not None:
+                        response = await first_completion
+                    else:
+                        response = await self._create_agent_completion(messages)
+                    response_message = response.choices[0].message
+                    tool_calls = getattr(response_message, "tool_calls", None)
                
                 if tool_calls:
                     print(f"[Orchestrator] Tool calls detected (Iteration {i+1}): {len(tool_calls)}")
                     messages.append(response_message) # Add assistant's tool call message
                    
-                    for tc in tool_calls:
-                        func_name = tc.function.name
+                    # Batch the document searches of this turn into one embeddings round-trip;
+                    # runs alongside the tool tasks so other tools don't wait for retrieval
+                    prefetch = asyncio.create_task(self._prefetch_document_chunks(tool_calls, top_k))
+                   
+                    yield {"type": "tool_start", "iteration": i + 1, "tools": [
+                        {"name": tc.function.name, "query": _tool_call_query(tc)} for tc in tool_calls
+                    ]}
+
+                    # Independent tool calls of this turn run concurrently and are reported as they
+                    # finish; their results are merged below in tool_call order.
+                    tasks = [
+                        asyncio.create_task(self._run_orchestrator_tool(tc, top_k, user_id, user_role, prefetch))
+                        for tc in tool_calls
+                    ]
+                    for finished in asyncio.as_completed(tasks):
+                        func_name, args, tool_result = await finished
+                        yield {
+                            "type": "tool_end",
+                            "name": func_name,
+                            "query": args.get("query", ""),
+                            "success": bool(tool_result and tool_result.get("success")),
+                        }
+                    outcomes = [task.result() for task in tasks]
+                    prefetch.cancel() # No-op once done; stops it if every search timed out
+                   
+                    for tc, (func_name, args, tool_result) in zip(tool_calls, outcomes):
                         all_tools_used.append(func_name)
-                       
-                        print(f"[Orchestrator] Routing to: {func_name}")
-                       
-                        try:
-                            args = json.loads(tc.function.arguments) if isinstance(tc.function.arguments, str) else tc.function.arguments
-                        except json.JSONDecodeError:
-                            args = tc.function.arguments # Keep as string if not valid JSON
+                        llm_calls += (tool_result or {}).get("llm_calls", 0)
                        
                         tool_output_content = None # To store output for tool message
                        
                         if func_name == "search_documents":
-                            rag_result = await self._execute_rag_pipeline(
-                                query=args.get("query", ""), # Ensure query is passed
-                                top_k=args.get("top_k", top_k)
-                            )
+                            rag_result = tool_result
+                            new_chunks, repeated, context_text = [], 0, ""
+                            if rag_result.get("success"):
+                                # Keep only chunks not already collected this turn (trimmed where they overlap)
+                                new_chunks, repeated = await asyncio.to_thread(turn_chunks.filter, rag_result.get("sources", []))
+                                context_text = rag_result.get("context_text", "") if not repeated else format_chunks(new_chunks)
+
+                            if rag_result.get("mode") == "retrieval":
+                                # The model already has the repeated passages from an earlier call this turn
+                                if rag_result.get("success") and not context_text:
+                                    tool_output = {"context": "No new passages: every result repeats context already returned this turn."}
+                                else:
+                                    tool_output = {"context": context_text}
+                            else:
+                                tool_output = {"answer": rag_result.get("answer")}
                             tool_output_content = json.dumps({
-                                "answer": rag_result.get("answer"),
+                                **tool_output,
                                 "identified_sources": rag_result.get("identified_sources"),
                                 "error": rag_result.get("error")
                             })
  
                             if rag_result.get("success"):
-                                # Accumulate all chunks for UI display
-                                all_sources_for_ui.extend(rag_result.get("sources", []))
+                                # Accumulate the new chunks for UI display and QnT
+                                all_sources_for_ui.extend(new_chunks)
                                 # Accumulate unique sources identified by RAG LLM for final formatting
                                 for s in rag_result.get("identified_sources", []):
                                     all_unique_final_sources.add(s)
-                                all_context_texts.append(rag_result.get("context_text", ""))
+                                if context_text:
+                                    all_context_texts.append(context_text)
                                
                                 if "rag_executions" not in all_debug_info:
                                     all_debug_info["rag_executions"] = []
                                 all_debug_info["rag_executions"].append({
                                     "query": args.get("query", ""),
                                     "num_chunks": rag_result.get("num_chunks", 0),
+                                    "context_stats": rag_result.get("context_stats", {}),
+                                    "repeated_chunks_dropped": repeated,
+                                    "mode": rag_result.get("mode"),
+                                    "latency_ms": rag_result.get("latency_ms"),
+                                    "tool_output_tokens": count_tokens(tool_output_content),
                                     "identified_sources": rag_result.get("identified_sources", [])
                                 })
                             else:
@@ -386,12 +793,7 @@ class LangChainOrchestrator:
                                 all_debug_info["rag_errors"].append(rag_result.get("error"))
                        
                         elif func_name == "query_healthcare_system":
-                            mcp_result = await self._execute_mcp_pipeline(
-                                query=args.get("query", ""), # Ensure query is passed
-                                history=[], # Don't pass history to sub-pipeline, orchestrator manages overall
-                                user_id=user_id,
-                                user_role=user_role
-                            )
+                            mcp_result = tool_result
                             tool_output_content = json.dumps({
                                 "answer": mcp_result.get("answer"),
                                 "tools_called": [t["name"] for t in mcp_result.get("tools_called", [])],
@@ -433,12 +835,25 @@ class LangChainOrchestrator:
                     # No tool calls detected, meaning the model is ready to give a final answer
                     break # Exit the loop, the next call will be for final synthesis
            
-            # Final step: Get the synthesized answer from the orchestrator
-            final_response = self.agent_client.chat.completions.create(
-                model=AZURE_OPENAI_CHAT_MODEL,
-                messages=messages,
-            )
-            final_answer_raw = final_response.choices[0].message.content or ""
+            # Final step: stream the synthesized answer from the orchestrator
+            # (not needed when the loop already ended with a tool-free answer)
+            if final_answer_raw is None:
+                llm_calls += 1
+                final_stream = await self._get_async_agent_client().chat.completions.create(
+                    model=AZURE_OPENAI_CHAT_MODEL,
+                    messages=messages,
+                    stream=True,
+                )
+                answer_parts = []
+                async for chunk in final_stream:
+                    # Azure sends content-filter chunks without choices
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if first_token_ms is None:
+                            first_token_ms = int((time.time() - start) * 1000)
+                        answer_parts.append(delta)
+                        yield {"type": "token", "content": delta}
+                final_answer_raw = "".join(answer_parts)
            
             # Format unique sources
             final_formatted_sources = ""
@@ -454,6 +869,7 @@ class LangChainOrchestrator:
                 "sources:" in final_answer_raw.lower() or "source:" in final_answer_raw.lower()
             ):
                 final_answer = final_answer_raw + final_formatted_sources
+                yield {"type": "token", "content": final_formatted_sources}
             else:
                 final_answer = final_answer_raw
  
@@ -465,7 +881,10 @@ class LangChainOrchestrator:
                     print("[Orchestrator] Calculating QnT metrics...")
                     # Combine all context texts for overall QnT evaluation
                     combined_context = "\n\n".join(all_context_texts)
-                    evaluation = self.qnt_evaluator.evaluate_response(
+                    # Blocking LLM calls, BERTScore and ragas: run in a worker thread so other
+                    # sessions on the shared event loop keep streaming meanwhile
+                    evaluation = await asyncio.to_thread(
+                        self.qnt_evaluator.evaluate_response,
                         query=query,
                         answer=final_answer,
                         context=combined_context, # Use combined context
@@ -480,32 +899,59 @@ class LangChainOrchestrator:
            
             latency = int((time.time() - start) * 1000)
            
-            return PipelineResult(
+            result = PipelineResult(
                 answer=final_answer,
                 tools_used=all_tools_used,
                 sources=all_sources_for_ui, # Pass all retrieved chunks for UI display
                 debug={
                     **all_debug_info,
                     "tool_calls_made": len(all_tools_used),
-                    "direct_response": len(all_tools_used) == 0
+                    "direct_response": len(all_tools_used) == 0,
+                    "cached": False,
+                    "first_token_ms": first_token_ms,
+                    "llm_calls": llm_calls,
+                    "final_synthesis": ORCH_FINAL_SYNTHESIS,
+                    "rag_search_mode": RAG_SEARCH_MODE,
+                    "embedding_cache": embedding_cache.stats(),
+                    "reranker": reranker.stats(),
+                    "tool_response_cache": tool_response_cache.stats(),
+                    "answer_cache": answer_cache.stats()
                 },
                 latency_ms=latency,
                 qnt_metrics=qnt_metrics
             )
+
+            # Only document answers are shared (healthcare/employee data depends on the user, not just the role),
+            # and nothing is stored while the indexer may still be applying a recent change
+            if use_answer_cache and all_sources_for_ui and set(all_tools_used) == {"search_documents"} and index_version.settled():
+                if query_vector is None:
+                    # No similarity lookup ran (empty scope); the answer has already streamed
+                    try:
+                        query_vector = await rag_chat_async.embed_query(query)
+                    except Exception as e:
+                        print(f"[Orchestrator] Answer cache embedding failed: {e}")
+                answer_cache.store(query, query_vector, cache_scope, result.model_copy(deep=True))
+            yield {"type": "result", "result": result}
            
         except Exception as e:
             error_msg = f"Error processing query: {str(e)}"
             print(f"\n[Orchestrator Error] {error_msg}")
             import traceback
             traceback.print_exc()
+            if cache_lookup is not None and not cache_lookup.done():
+                cache_lookup.cancel()
+            if first_completion is not None and not first_completion.done():
+                await self._discard_completion(first_completion)
            
             latency = int((time.time() - start) * 1000)
            
-            return PipelineResult(
-                answer="I apologize, but I encountered an error processing your request. Please try again.",
+            answer = "I apologize, but I encountered an error processing your request. Please try again."
+            yield {"type": "token", "content": answer if first_token_ms is None else f"\n\n{answer}"}
+            yield {"type": "result", "result": PipelineResult(
+                answer=answer,
                 tools_used=all_tools_used,
                 sources=[],
                 debug={"error": error_msg, "traceback": traceback.format_exc()},
                 latency_ms=latency,
                 qnt_metrics=None
-            )
+            )}
@@ -3,6 +3,11 @@ import streamlit as st
 import asyncio
 import os, sys
 import time
+import queue
+import threading
+import atexit
+import weakref
+import concurrent.futures
 import base64
 from urllib.parse import urlparse
  
@@ -15,6 +20,101 @@ from orchestration import LangChainOrchestrator
 import requests
  
  
+class OrchestratorLoop:
+    """
+    One event loop on a daemon thread, shared by every session of the Streamlit process.
+
+    Pooled clients (the MCP httpx client, the async AOAI/Search clients) are bound
+    to the loop they were opened on, so keeping a single long-lived loop lets them
+    be reused across turns. Each orchestrator is started on first use; everything
+    is shut down when the process exits.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._started = weakref.WeakSet()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="orchestrator-loop", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    async def _run_turn(self, orchestrator, events: queue.Queue, **kwargs):
+        if orchestrator not in self._started:
+            await orchestrator.startup()
+            self._started.add(orchestrator)
+        async for event in orchestrator.process_query_stream(**kwargs):
+            events.put(event)
+
+    def submit_turn(self, orchestrator, events: queue.Queue, **kwargs) -> concurrent.futures.Future:
+        """Schedule one streamed chat turn on the loop, forwarding its events to `events`."""
+        return asyncio.run_coroutine_threadsafe(self._run_turn(orchestrator, events, **kwargs), self.loop)
+
+    async def _shutdown(self):
+        for orchestrator in list(self._started):
+            await orchestrator.shutdown()
+        self._started = weakref.WeakSet()
+
+    def close(self, timeout: float = 10):
+        """Close the pooled clients and stop the loop (registered with atexit)."""
+        if self.loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except Exception as e:
+            print(f"[UI] Orchestrator shutdown failed: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+
+@st.cache_resource
+def get_orchestrator_loop() -> OrchestratorLoop:
+    return OrchestratorLoop()
+
+
+def stream_orchestrator_turn(orchestrator, turn: dict, on_event=None, **kwargs):
+    """
+    Sync generator over the answer tokens of one chat turn, for st.write_stream.
+
+    The turn runs on the process-wide orchestrator loop. Tool events are passed
+    to on_event, and the final PipelineResult is stored in turn["result"]
+    (turn["error"] if the turn could not run).
+    """
+    events = queue.Queue()
+    done = object()
+
+    def finished(future: concurrent.futures.Future):
+        if not future.cancelled() and future.exception() is not None:
+            turn["error"] = future.exception()
+        events.put(done)
+
+    future = get_orchestrator_loop().submit_turn(orchestrator, events, **kwargs)
+    future.add_done_callback(finished)
+    try:
+        while (event := events.get()) is not done:
+            if event["type"] == "token":
+                yield event["content"]
+            elif event["type"] == "result":
+                turn["result"] = event["result"]
+            elif on_event:
+                on_event(event)
+    finally:
+        # The script run was stopped (e.g. the user sent another message): don't leave the turn running
+        if not future.done():
+            future.cancel()
+
+
+def show_tool_event(status, event: dict):
+    """Report tool progress of a streamed turn in a st.status container."""
+    if event["type"] == "tool_start":
+        names = ", ".join(tool["name"] for tool in event["tools"])
+        status.update(label=f"🔧 Calling {names}...", state="running")
+    elif event["type"] == "tool_end":
+        icon = "✅" if event["success"] else "⚠️"
+        query = f": {event['query']}" if event.get("query") else ""
+        status.write(f"{icon} `{event['name']}`{query}")
+ 
+ 
 # Page config
 st.set_page_config(page_title="AI Chatbot", page_icon="🤖", layout="centered")
 
@@ -215,21 +315,27 @@ if prompt:
         st.session_state["history"].append({"role": "assistant", "content": answer})
     else:
         try:
-            with st.spinner("🤔 Thinking..."):
-                # Run async process_query and pass the current user's id and role
-                result = asyncio.run(
-                    st.session_state["orchestrator"].process_query(
+            # Stream the answer as it is generated; tool progress goes to the status box
+            turn = {}
+            with st.chat_message("assistant"):
+                status = st.status("🤔 Thinking...", expanded=False)
+                st.write_stream(
+                    stream_orchestrator_turn(
+                        st.session_state["orchestrator"],
+                        turn,
+                        on_event=lambda event: show_tool_event(status, event),
                         query=prompt,
                         history=st.session_state["history"][:-1],  # Exclude the current user message
                         user_id=st.session_state.get('user_id'),
                         user_role=st.session_state.get('role')
                     )
                 )
+                status.update(label="✅ Done", state="complete")
+            if "result" not in turn:
+                raise turn.get("error") or RuntimeError("No response from the orchestrator")
+            result = turn["result"]
 
-            # Render assistant answer
             answer = result.answer
-            with st.chat_message("assistant"):
-                st.markdown(answer)
             st.session_state["history"].append({"role": "assistant", "content": answer})
 
             # Show tool usage and additional info
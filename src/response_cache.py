@@ -0,0 +1,105 @@
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cachetools import TTLCache
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """
+    Read-through cache for API responses, keyed by route and arguments.
+
+    Entries expire after `ttl` seconds and the least recently used entry is evicted
+    once `maxsize` is reached. Used by the FastAPI server (as a dependency) and by
+    call_fastapi_tool on the client side.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 60, name: str = "response"):
+        self.name = name
+        self.enabled = maxsize > 0 and ttl > 0
+        self._cache = TTLCache(maxsize=max(maxsize, 1), ttl=max(ttl, 1))
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(route: str, args: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key from a route and its (order-independent) arguments."""
+        if not args:
+            return route
+        return f"{route}?{json.dumps(args, sort_keys=True, default=str)}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._cache[key] = value
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, or call loader() and cache its result.
+        Exceptions raised by loader (e.g. a 404) are propagated and not cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        self.set(key, value)
+        return value
+
+    async def aget_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of get_or_load for loaders that return an awaitable."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = await loader()
+        self.set(key, value)
+        return value
+
+    def invalidate(self, prefix: Optional[str] = None) -> int:
+        """
+        Drop cached entries whose key starts with prefix (all entries if prefix is None).
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if prefix is None:
+                removed = len(self._cache)
+                self._cache.clear()
+            else:
+                keys = [k for k in list(self._cache.keys()) if k.startswith(prefix)]
+                for k in keys:
+                    self._cache.pop(k, None)
+                removed = len(keys)
+            self.invalidations += 1
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "ttl": self._cache.ttl,
+            "invalidations": self.invalidations,
+        }
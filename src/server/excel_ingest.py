@@ -0,0 +1,279 @@
+"""
+Bulk loader for the healthcare workbooks in data/excel.
+
+Workbooks are streamed in read-only mode and processed in chunks: each chunk is
+validated against the API's Pydantic schema and written with one bulk upsert
+statement. A SHA-256 of every loaded file is kept in the ingestion_log table so
+unchanged workbooks are skipped on the next run (use --force to reload anyway).
+
+Usage:
+    python src/server/excel_ingest.py [--data-dir data/excel] [--chunk-size 5000] [--force]
+                                      [--api-url http://127.0.0.1:8001]
+"""
+import os, sys
+import time
+import hashlib
+import argparse
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select, update
+from sqlalchemy.orm import Session
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+# Keeps IN (...) lists under SQL Server's 2100 bind-parameter limit
+_MAX_IN_PARAMS = 1000
+
+# Content hash of the last successful load per table/workbook
+ingestion_log = Table(
+    "ingestion_log",
+    MetaData(),
+    Column("table_name", String(100), primary_key=True),
+    Column("source_file", String(255), primary_key=True),
+    Column("content_hash", String(64), nullable=False),
+    Column("row_count", Integer, nullable=False),
+    Column("loaded_at", DateTime, nullable=False),
+)
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Hash a file in blocks so large workbooks are not read into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_excel_chunks(path: str, model, chunk_size: int = INGEST_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stream a workbook whose header row matches the model's column names.
+
+    Args:
+        path: Path to the .xlsx file
+        model: SQLAlchemy model the rows are loaded into
+        chunk_size: Rows per yielded chunk
+
+    Returns:
+        Iterator of row-dict lists; String columns are coerced to str
+    """
+    from openpyxl import load_workbook
+
+    columns = {c.name: c for c in model.__table__.columns}
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else None for h in next(rows, [])]
+        chunk = []
+        for values in rows:
+            if all(v is None for v in values):
+                continue
+            record = {}
+            for name, value in zip(header, values):
+                if name not in columns:
+                    continue
+                if value is not None and isinstance(columns[name].type, String):
+                    value = value.date().isoformat() if hasattr(value, "date") else str(value)
+                record[name] = value
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def validate_rows(rows: List[Dict[str, Any]], schema) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Validate rows against a Pydantic schema.
+
+    Returns:
+        (valid rows, one error message per rejected row)
+    """
+    valid, errors = [], []
+    for row in rows:
+        try:
+            valid.append(schema.model_validate(row).model_dump(include=set(row)))
+        except ValidationError as e:
+            first = e.errors()[0]
+            errors.append(f"{row}: {'.'.join(str(p) for p in first['loc'])} {first['msg']}")
+    return valid, errors
+
+
+def upsert_rows(db: Session, model, rows: List[Dict[str, Any]]):
+    """
+    Insert rows, updating those whose primary key already exists.
+    SQLite and PostgreSQL use a single INSERT .. ON CONFLICT statement; other dialects
+    (SQL Server) look up existing keys and issue one bulk UPDATE plus one bulk INSERT.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    pk_names = [c.name for c in table.primary_key.columns]
+    value_names = [name for name in rows[0] if name not in pk_names]
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        if value_names:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=pk_names,
+                set_={name: stmt.excluded[name] for name in value_names},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=pk_names)
+        db.execute(stmt, rows)
+        return
+
+    # Generic path: single-column primary keys (all healthcare tables)
+    pk_column = table.c[pk_names[0]]
+    keys = [row[pk_column.name] for row in rows]
+    existing = set()
+    for start in range(0, len(keys), _MAX_IN_PARAMS):
+        batch = keys[start:start + _MAX_IN_PARAMS]
+        existing.update(db.execute(select(pk_column).where(pk_column.in_(batch))).scalars())
+    updates = [row for row in rows if row[pk_column.name] in existing]
+    inserts = [row for row in rows if row[pk_column.name] not in existing]
+    if updates:
+        # ORM bulk UPDATE by primary key (executemany)
+        db.execute(update(model), updates)
+    if inserts:
+        db.execute(insert(model), inserts)
+
+
+def _previous_hash(db: Session, table_name: str, source_file: str) -> Optional[str]:
+    return db.execute(
+        select(ingestion_log.c.content_hash).where(
+            ingestion_log.c.table_name == table_name,
+            ingestion_log.c.source_file == source_file,
+        )
+    ).scalar_one_or_none()
+
+
+def _record_load(db: Session, table_name: str, source_file: str, content_hash: str, row_count: int):
+    key = (ingestion_log.c.table_name == table_name) & (ingestion_log.c.source_file == source_file)
+    db.execute(ingestion_log.delete().where(key))
+    db.execute(ingestion_log.insert().values(
+        table_name=table_name,
+        source_file=source_file,
+        content_hash=content_hash,
+        row_count=row_count,
+        loaded_at=datetime.utcnow(),
+    ))
+
+
+def ingest_workbook(db: Session, path: str, model, schema, chunk_size: int = INGEST_CHUNK_SIZE, force: bool = False) -> Dict[str, Any]:
+    """
+    Load one workbook into its table in chunks and commit once at the end.
+
+    Args:
+        db: Session bound to the target database
+        path: Path to the .xlsx file
+        model: SQLAlchemy model (target table)
+        schema: Pydantic schema used to validate each row
+        chunk_size: Rows validated and written per statement
+        force: Reload even if the file hash matches the last load
+
+    Returns:
+        Load report: rows loaded/rejected, elapsed seconds and rows per second
+    """
+    table_name = model.__tablename__
+    source_file = os.path.basename(path)
+    report = {"table": table_name, "file": source_file, "loaded": 0, "rejected": 0, "skipped": False, "errors": []}
+
+    ingestion_log.create(bind=db.connection(), checkfirst=True)
+    content_hash = file_sha256(path)
+    if not force and _previous_hash(db, table_name, source_file) == content_hash:
+        report["skipped"] = True
+        print(f"ℹ️ {source_file} unchanged since last load, skipping '{table_name}'.")
+        return report
+
+    started = time.perf_counter()
+    try:
+        for chunk in iter_excel_chunks(path, model, chunk_size):
+            valid, errors = validate_rows(chunk, schema)
+            upsert_rows(db, model, valid)
+            report["loaded"] += len(valid)
+            report["rejected"] += len(errors)
+            report["errors"].extend(errors[:10 - len(report["errors"])])
+        _record_load(db, table_name, source_file, content_hash, report["loaded"])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_sec"] = round(report["loaded"] / elapsed, 1) if elapsed > 0 else 0.0
+    print(f"✅ Loaded {report['loaded']} rows into '{table_name}' from {source_file} "
+          f"({report['rows_per_sec']} rows/s, {report['rejected']} rejected)")
+    for error in report["errors"]:
+        print(f"⚠️ Rejected row in {source_file}: {error}")
+    return report
+
+
+def ingest_excel_dir(db: Session, data_dir: str, tables: Sequence[Tuple[str, Any, Any]], chunk_size: int = INGEST_CHUNK_SIZE, force: bool = False) -> List[Dict[str, Any]]:
+    """
+    Load every (filename, model, schema) workbook found in data_dir, in the given (foreign-key) order.
+
+    Returns:
+        One load report per workbook found
+    """
+    reports = []
+    for filename, model, schema in tables:
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            print(f"⚠️ Excel file not found: {path}")
+            continue
+        reports.append(ingest_workbook(db, path, model, schema, chunk_size=chunk_size, force=force))
+    return reports
+
+
+def invalidate_api_cache(api_url: str):
+    """Ask a running MCP server to drop its cached responses after a load."""
+    import httpx
+
+    try:
+        response = httpx.post(f"{api_url.rstrip('/')}/cache/invalidate", timeout=10)
+        response.raise_for_status()
+        print(f"✅ API cache invalidated ({response.json().get('removed', 0)} entries)")
+    except httpx.HTTPError as e:
+        print(f"⚠️ Could not invalidate API cache at {api_url}: {e}")
+
+
+def main(argv: Optional[List[str]] = None):
+    # Imported here so the server module can import this one for its startup seed
+    from src.server.mcp_server import Base, EXCEL_DATA_DIR, EXCEL_SEED_TABLES, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Bulk-load data/excel workbooks into the healthcare database.")
+    parser.add_argument("--data-dir", default=EXCEL_DATA_DIR, help="Directory containing patients/doctors/studies.xlsx")
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE, help="Rows per bulk statement")
+    parser.add_argument("--force", action="store_true", help="Reload workbooks even if unchanged since the last load")
+    parser.add_argument("--api-url", help="Base URL of a running MCP server whose response cache should be invalidated")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        reports = ingest_excel_dir(db, args.data_dir, EXCEL_SEED_TABLES, chunk_size=args.chunk_size, force=args.force)
+    elapsed = time.perf_counter() - started
+
+    loaded = sum(r["loaded"] for r in reports)
+    print(f"Done: {loaded} rows in {elapsed:.2f}s ({loaded / elapsed if elapsed > 0 else 0:.1f} rows/s)")
+    if args.api_url and loaded:
+        invalidate_api_cache(args.api_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -419,8 +419,14 @@ from azure.core.credentials import AzureKeyCredential
 from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobClient, BlobServiceClient
 from dotenv import load_dotenv
-import os
+import os, sys
 import uvicorn
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.index_version import read_index_version, bump_index_version
  
 # Load environment variables
 load_dotenv()
@@ -497,6 +503,11 @@ async def trigger_azure_ai_search_indexer():
 @app.get("/")
 async def read_root():
     return {"message": "Azure AI Search Indexer Trigger API. Use POST /trigger-indexer to trigger the default indexer."}
+
+@app.get("/index-version")
+async def get_index_version():
+    """Current corpus/index version; bumped by every endpoint that changes the documents."""
+    return read_index_version()
  
 @app.post("/upload/")
 async def upload_file(file: UploadFile = File(...)):
@@ -516,7 +527,8 @@ async def upload_file(file: UploadFile = File(...)):
         else:
             print("⚠️ Azure AI Search client not initialized, skipping indexer trigger.")
    
-        return {"filename": file.filename, "status": "uploaded", "indexer_triggered": bool(search_indexer_client)}
+        version = bump_index_version(f"upload:{file.filename}")
+        return {"filename": file.filename, "status": "uploaded", "indexer_triggered": bool(search_indexer_client), "index_version": version["version"]}
     except Exception as e:
         print(f"❌ Error during file upload or indexer trigger: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to upload file or trigger indexer: {str(e)}")
@@ -546,7 +558,8 @@ async def delete_blob_file(filename: str):
         else:
             print("⚠️ Azure AI Search client not initialized, skipping indexer reset/trigger after deletion.")
        
-        return {"message": f"File '{filename}' deleted successfully."}
+        version = bump_index_version(f"delete:{filename}")
+        return {"message": f"File '{filename}' deleted successfully.", "index_version": version["version"]}
     except HTTPException:
         raise
     except Exception as e:
@@ -587,11 +600,13 @@ async def cleanup_temporary_pdfs():
         elif deleted_count > 0:
             print("⚠️ Azure AI Search client not initialized, skipping indexer reset/trigger after cleanup.")
        
+        version = bump_index_version("cleanup-temporary-pdfs") if deleted_count > 0 else read_index_version()
         return {
             "message": f"Cleanup complete. Deleted {deleted_count} temporary PDFs. Skipped {skipped_count} protected PDFs.",
             "deleted_files": deleted_files,
             "deleted_count": deleted_count,
-            "skipped_count": skipped_count
+            "skipped_count": skipped_count,
+            "index_version": version["version"]
         }
     except Exception as e:
         print(f"❌ Error during cleanup process: {e}")
@@ -709,9 +724,11 @@ async def reset_index_and_cleanup():
         print("RESET COMPLETE")
         print("="*60)
         
+        version = bump_index_version("reset-index-and-cleanup")
         return {
             "message": "Index reset and cleanup completed successfully",
             "results": results,
+            "index_version": version["version"],
             "summary": {
                 "blobs_deleted": len(deleted_files),
                 "blobs_kept": len(skipped_files),
@@ -1,18 +1,37 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Enum, Date
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship
-from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship, selectinload
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, ConfigDict, EmailStr
-from typing import List, Optional
-import os
+from typing import Any, Callable, Dict, List, Optional, Union
+import os, sys
 import uvicorn
 import enum
 from passlib.hash import pbkdf2_sha256
 from dotenv import load_dotenv
 from datetime import date
 
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.response_cache import ResponseCache
+from src.server.excel_ingest import ingest_excel_dir
+
 load_dotenv()
 
+# Read-through cache for read endpoints (SERVER_CACHE_SIZE=0 disables it)
+SERVER_CACHE_SIZE = int(os.getenv("SERVER_CACHE_SIZE", "1024"))
+SERVER_CACHE_TTL = float(os.getenv("SERVER_CACHE_TTL", "300"))
+
+# Page size bounds for list endpoints
+API_DEFAULT_PAGE_SIZE = int(os.getenv("API_DEFAULT_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "500"))
 
 # Database configuration (Update for SQL Server)
 # server = 'CTAADHBBR8D3\\SQLEXPRESS22'  # Use double backslash for Python
@@ -46,15 +65,74 @@ connection_string = (
  
 params = urllib.parse.quote_plus(connection_string)
  
-# Final SQLAlchemy connection URL
-DATABASE_URL = f"mssql+pyodbc:///?odbc_connect={params}"
+# Final SQLAlchemy connection URL (DATABASE_URL overrides, e.g. sqlite:///./demo.db or sqlite:///:memory:)
+DATABASE_URL = os.getenv("DATABASE_URL", f"mssql+pyodbc:///?odbc_connect={params}")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Connection pool settings (ignored for SQLite); size pool_size + max_overflow for the worker count
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Async database path: DB_ASYNC=true serves routes through an AsyncSession.
+# ASYNC_DATABASE_URL defaults to DATABASE_URL with its async driver (aiosqlite / aioodbc / asyncpg).
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mssql": "mssql+aioodbc",
+    "mssql+pyodbc": "mssql+aioodbc",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Seed empty patient/doctor/study tables from data/excel at startup (defaults to on for SQLite)
+DB_SEED_FROM_EXCEL = os.getenv("DB_SEED_FROM_EXCEL", "true" if IS_SQLITE else "false").lower() in ("1", "true", "yes")
+EXCEL_DATA_DIR = os.getenv("EXCEL_DATA_DIR", os.path.join(ROOT_DIR, "data", "excel"))
+# Initial admin for an empty employees table (e.g. SQLite mode); skipped unless SEED_ADMIN_PASSWORD is set
+SEED_ADMIN_USERNAME = os.getenv("SEED_ADMIN_USERNAME", "admin")
+SEED_ADMIN_PASSWORD = os.getenv("SEED_ADMIN_PASSWORD")
+SEED_ADMIN_EMAIL = os.getenv("SEED_ADMIN_EMAIL", "admin@example.com")
+
+def engine_options(url: str) -> Dict[str, Any]:
+    if url.startswith("sqlite"):
+        options = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in url or url.split("://", 1)[-1].strip("/") == "":
+            # A single shared connection, otherwise every session would see its own empty in-memory database
+            options["poolclass"] = StaticPool
+        return options
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if url.startswith("mssql+pyodbc"):
+        # Send executemany batches (bulk inserts/updates) in one round trip instead of row by row
+        options["fast_executemany"] = True
+    return options
+
+def build_engine(url: str):
+    return create_engine(url, **engine_options(url))
  
 # Create engine
-engine = create_engine(DATABASE_URL)
+engine = build_engine(DATABASE_URL)
  
  
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine/session, only created when the async path is enabled
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL)) if DB_ASYNC else None
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if DB_ASYNC else None
 Base = declarative_base()
 
 # ------------------- MODELS -------------------
@@ -125,22 +203,118 @@ class Employee(Base):
     #     return f"<Login(username={self.username}, email={self.email}, role={self.role})>"
 
 
-Base.metadata.create_all(bind=engine)
+# ------------------- DATABASE INIT -------------------
+def seed_from_excel(db: Session, data_dir: str = EXCEL_DATA_DIR):
+    """Load data/excel/*.xlsx into empty patient/doctor/study tables (see src/server/excel_ingest.py for reloads)."""
+    if db.query(PatientInfo.id).first() is not None:
+        print("ℹ️ Patients table already populated, skipping Excel seed.")
+        return
+    ingest_excel_dir(db, data_dir, EXCEL_SEED_TABLES)
+
+def seed_admin(db: Session):
+    """Create the initial admin account when the employees table is empty, so /authenticate works on a fresh database."""
+    if db.query(Employee.id).first() is not None:
+        return
+    if not SEED_ADMIN_PASSWORD:
+        print("ℹ️ Employees table is empty; set SEED_ADMIN_PASSWORD to create an initial admin, or use POST /register.")
+        return
+    db.add(Employee(
+        username=SEED_ADMIN_USERNAME,
+        email=SEED_ADMIN_EMAIL,
+        password=pbkdf2_sha256.hash(SEED_ADMIN_PASSWORD),
+        role="admin",
+        doj=date.today(),
+        designation="Administrator",
+        department="Administration",
+        location="N/A",
+    ))
+    db.commit()
+    print(f"✅ Created initial admin '{SEED_ADMIN_USERNAME}'.")
+
+def seed_db(db: Session):
+    seed_admin(db)
+    if DB_SEED_FROM_EXCEL:
+        seed_from_excel(db)
+
+def init_db():
+    """Create missing tables and optionally seed them. Called from the app lifespan, not at import."""
+    try:
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            seed_db(db)
+    except (OperationalError, SQLAlchemyError) as exc:
+        # Database not available at startup; endpoints return 503 when used
+        print(f"❌ Database initialization failed: {exc}")
+
+async def init_db_async():
+    """Async-engine variant of init_db."""
+    try:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as session:
+            await session.run_sync(seed_db)
+    except (OperationalError, SQLAlchemyError) as exc:
+        print(f"❌ Database initialization failed: {exc}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_ASYNC:
+        await init_db_async()
+    else:
+        init_db()
+    yield
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
 
 # ------------------- FASTAPI APP -------------------
-app = FastAPI()
+# operationId == route function name, so the OpenAPI schema maps 1:1 onto LLM tool names
+# (see routes_from_openapi in src/clients/mcp_client.py). Routes tagged "tools" are exposed as tools.
+app = FastAPI(lifespan=lifespan, generate_unique_id_function=lambda route: route.name)
+TOOL_TAGS = ["tools"]
+
+response_cache = ResponseCache(maxsize=SERVER_CACHE_SIZE, ttl=SERVER_CACHE_TTL, name="server")
 
-# Dependency
-def get_db():
+# Dependencies
+def get_response_cache() -> ResponseCache:
+    return response_cache
+
+def request_cache_key(request: Request) -> str:
+    """Cache key from the request path and its query parameters (repeated params such as ids=1&ids=2 are kept)."""
+    params = {}
+    for key in request.query_params.keys():
+        values = request.query_params.getlist(key)
+        params[key] = values if len(values) > 1 else values[0]
+    return ResponseCache.make_key(request.url.path, params)
+
+DbSession = Union[Session, AsyncSession]
+
+async def get_db():
+    """Yield an AsyncSession when DB_ASYNC is enabled, otherwise a regular Session."""
     db = None
     try:
-        db = SessionLocal()
+        db = AsyncSessionLocal() if DB_ASYNC else SessionLocal()
         yield db
     except OperationalError as exc:
         raise HTTPException(status_code=503, detail="Database unavailable") from exc
     finally:
-        if db:
-            db.close()
+        if isinstance(db, AsyncSession):
+            await db.close()
+        elif db is not None:
+            await run_in_threadpool(db.close)
+
+async def run_db(db: DbSession, fn: Callable[[Session], Any]) -> Any:
+    """
+    Run fn(session) against either session flavor, so each route's query code is written once.
+    AsyncSession runs it via run_sync on the async driver; a sync Session runs it in the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn)
+    return await run_in_threadpool(fn, db)
+
+async def load_cached(request: Request, db: DbSession, cache: ResponseCache, fn: Callable[[Session], Any]) -> Any:
+    """Serve a read route from the response cache, or run fn on the database and cache the result."""
+    return await cache.aget_or_load(request_cache_key(request), lambda: run_db(db, fn))
 
 # ------------------- SCHEMAS -------------------
 class PatientSchema(BaseModel):
@@ -174,6 +348,17 @@ class StudySchema(BaseModel):
     findings: str
     model_config = ConfigDict(from_attributes=True)
 
+class PatientOverviewSchema(PatientSchema):
+    doctors: List[DoctorSchema] = []
+    studies: List[StudySchema] = []
+
+# Workbooks in data/excel with their target table and row schema, in foreign-key order
+EXCEL_SEED_TABLES = [
+    ("patients.xlsx", PatientInfo, PatientSchema),
+    ("doctors.xlsx", Doctor, DoctorSchema),
+    ("studies.xlsx", Study, StudySchema),
+]
+
 
 class EmployeeSchema(BaseModel):
     id: int
@@ -191,79 +376,279 @@ class EmployeeSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class EmployeePublicSchema(BaseModel):
+    """Employee fields returned by the read endpoints (these are LLM tools): never the password hash."""
+    id: int
+    username: str
+    email: EmailStr
+    role: str
+    doj: date
+    designation: str
+    department: str
+    location: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RecordPage(BaseModel):
+    """One page of a list endpoint."""
+    items: List[Dict[str, Any]]
+    has_more: bool  # More records match after this page
+    next_after_id: Optional[int] = None  # Pass as after_id to get the next page
+
+
+# ------------------- LIST HELPERS -------------------
+def page_params(
+    limit: int = Query(API_DEFAULT_PAGE_SIZE, ge=1, le=API_MAX_PAGE_SIZE, description="Maximum number of records to return"),
+    offset: int = Query(0, ge=0, description="Number of records to skip"),
+    after_id: Optional[int] = Query(None, description="Keyset pagination: only return records with an ID greater than this"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return, e.g. 'id,name'"),
+) -> Dict[str, Any]:
+    return {"limit": limit, "offset": offset, "after_id": after_id, "fields": fields}
+
+def parse_fields(fields: Optional[str], schema) -> Optional[set]:
+    """Validate a comma-separated field projection against a schema."""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+def list_records(db: Session, model, schema, key_column, page: Dict[str, Any], exact: Optional[Dict[str, Any]] = None, contains: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Paginated, filtered and projected listing of a table.
+    exact: column -> value equality filters; contains: column -> case-insensitive substring filters.
+    Results are ordered by key_column so offset and after_id pages are stable.
+    Returns a RecordPage dict; one extra row is fetched to tell whether more records follow.
+    """
+    include = parse_fields(page["fields"], schema)
+    query = db.query(model)
+    for column, value in (exact or {}).items():
+        if value is not None:
+            query = query.filter(getattr(model, column) == value)
+    for column, value in (contains or {}).items():
+        if value:
+            query = query.filter(getattr(model, column).ilike(f"%{value}%"))
+    if page["after_id"] is not None:
+        query = query.filter(key_column > page["after_id"])
+    rows = query.order_by(key_column).offset(page["offset"]).limit(page["limit"] + 1).all()
+    has_more = len(rows) > page["limit"]
+    rows = rows[:page["limit"]]
+    return {
+        "items": [schema.model_validate(row).model_dump(include=include) for row in rows],
+        "has_more": has_more,
+        "next_after_id": getattr(rows[-1], key_column.key) if has_more else None,
+    }
+
+def ids_params(
+    ids: List[int] = Query(..., description="IDs to look up, passed as repeated parameters: ids=1&ids=2"),
+) -> List[int]:
+    if len(ids) > API_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {API_MAX_PAGE_SIZE} ids per request")
+    return ids
+
+def get_records_by_ids(db: Session, model, schema, key_column, ids: List[int]) -> Dict[str, Any]:
+    """
+    Resolve many IDs with a single IN query instead of one lookup per ID.
+    Items follow the requested order; IDs without a record are listed in missing_ids.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    rows = db.query(model).filter(key_column.in_(unique_ids)).all()
+    found = {getattr(row, key_column.key): row for row in rows}
+    return {
+        "items": [schema.model_validate(found[i]).model_dump() for i in unique_ids if i in found],
+        "missing_ids": [i for i in unique_ids if i not in found],
+    }
+
 # ------------------- ROUTES -------------------
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Patient-Doctor-Study API."}
 
 # Patients
-@app.get("/patients", response_model=List[PatientSchema])
-def get_all_patients(db: Session = Depends(get_db)):
-    return db.query(PatientInfo).all()
-
-@app.get("/patient/{patient_id}", response_model=PatientSchema)
-def get_patient_by_id(patient_id: int, db: Session = Depends(get_db)):
-    patient = db.query(PatientInfo).filter(PatientInfo.id == patient_id).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
-    return patient
+@app.get("/patients", response_model=RecordPage, tags=TOOL_TAGS)
+async def get_all_patients(
+    request: Request,
+    name: Optional[str] = Query(None, description="Filter by (partial) patient name"),
+    gender: Optional[str] = Query(None, description="Filter by gender"),
+    diagnosis: Optional[str] = Query(None, description="Filter by (partial) diagnosis"),
+    page: Dict[str, Any] = Depends(page_params),
+    db: DbSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_response_cache),
+):
+    """Get a paginated list of patients, optionally filtered and projected to selected fields. Returns {items, has_more, next_after_id}; pass next_after_id as after_id for the next page."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: list_records(db, PatientInfo, PatientSchema, PatientInfo.id, page,
+                             exact={"gender": gender}, contains={"name": name, "diagnosis": diagnosis}),
+    )
+
+@app.get("/patient/{patient_id}", response_model=PatientSchema, tags=TOOL_TAGS)
+async def get_patient_by_id(patient_id: int, request: Request, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get patient details by patient ID."""
+    def load(db: Session):
+        patient = db.query(PatientInfo).filter(PatientInfo.id == patient_id).first()
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        return PatientSchema.model_validate(patient)
+    return await load_cached(request, db, cache, load)
+
+@app.get("/patients/by-ids", response_model=Dict[str, Any], tags=TOOL_TAGS)
+async def get_patients_by_ids(request: Request, ids: List[int] = Depends(ids_params), db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get details of several patients by their IDs in one call."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: get_records_by_ids(db, PatientInfo, PatientSchema, PatientInfo.id, ids),
+    )
 
 # Doctors
-@app.get("/doctors", response_model=List[DoctorSchema])
-def get_all_doctors(db: Session = Depends(get_db)):
-    return db.query(Doctor).all()
-
-@app.get("/doctor/{doctor_id}", response_model=DoctorSchema)
-def get_doctor_by_id(doctor_id: int, db: Session = Depends(get_db)):
-    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
-    if not doctor:
-        raise HTTPException(status_code=404, detail="Doctor not found")
-    return doctor
+@app.get("/doctors", response_model=RecordPage, tags=TOOL_TAGS)
+async def get_all_doctors(
+    request: Request,
+    doctor_name: Optional[str] = Query(None, description="Filter by (partial) doctor name"),
+    specialization: Optional[str] = Query(None, description="Filter by (partial) specialization"),
+    designation: Optional[str] = Query(None, description="Filter by (partial) designation"),
+    patient_id: Optional[int] = Query(None, description="Filter by patient ID"),
+    page: Dict[str, Any] = Depends(page_params),
+    db: DbSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_response_cache),
+):
+    """Get a paginated list of doctors, optionally filtered and projected to selected fields. Returns {items, has_more, next_after_id}; pass next_after_id as after_id for the next page."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: list_records(db, Doctor, DoctorSchema, Doctor.id, page,
+                             exact={"patient_id": patient_id},
+                             contains={"doctor_name": doctor_name, "specialization": specialization, "designation": designation}),
+    )
+
+@app.get("/doctor/{doctor_id}", response_model=DoctorSchema, tags=TOOL_TAGS)
+async def get_doctor_by_id(doctor_id: int, request: Request, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get doctor details by doctor ID."""
+    def load(db: Session):
+        doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+        if not doctor:
+            raise HTTPException(status_code=404, detail="Doctor not found")
+        return DoctorSchema.model_validate(doctor)
+    return await load_cached(request, db, cache, load)
+
+@app.get("/doctors/by-ids", response_model=Dict[str, Any], tags=TOOL_TAGS)
+async def get_doctors_by_ids(request: Request, ids: List[int] = Depends(ids_params), db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get details of several doctors by their IDs in one call."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: get_records_by_ids(db, Doctor, DoctorSchema, Doctor.id, ids),
+    )
 
 # Studies
-@app.get("/studies", response_model=List[StudySchema])
-def get_all_studies(db: Session = Depends(get_db)):
-    return db.query(Study).all()
-
-@app.get("/study/{study_id}", response_model=StudySchema)
-def get_study_by_id(study_id: int, db: Session = Depends(get_db)):
-    study = db.query(Study).filter(Study.study_id == study_id).first()
-    if not study:
-        raise HTTPException(status_code=404, detail="Study not found")
-    return study
+@app.get("/studies", response_model=RecordPage, tags=TOOL_TAGS)
+async def get_all_studies(
+    request: Request,
+    study_type: Optional[str] = Query(None, description="Filter by (partial) study type, e.g. 'MRI'"),
+    patient_id: Optional[int] = Query(None, description="Filter by patient ID"),
+    doctor_id: Optional[int] = Query(None, description="Filter by doctor ID"),
+    page: Dict[str, Any] = Depends(page_params),
+    db: DbSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_response_cache),
+):
+    """Get a paginated list of studies, optionally filtered and projected to selected fields. Returns {items, has_more, next_after_id}; pass next_after_id as after_id for the next page."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: list_records(db, Study, StudySchema, Study.study_id, page,
+                             exact={"patient_id": patient_id, "doctor_id": doctor_id},
+                             contains={"study_type": study_type}),
+    )
+
+@app.get("/study/{study_id}", response_model=StudySchema, tags=TOOL_TAGS)
+async def get_study_by_id(study_id: int, request: Request, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get study details by study ID."""
+    def load(db: Session):
+        study = db.query(Study).filter(Study.study_id == study_id).first()
+        if not study:
+            raise HTTPException(status_code=404, detail="Study not found")
+        return StudySchema.model_validate(study)
+    return await load_cached(request, db, cache, load)
+
+@app.get("/studies/by-ids", response_model=Dict[str, Any], tags=TOOL_TAGS)
+async def get_studies_by_ids(request: Request, ids: List[int] = Depends(ids_params), db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get details of several studies by their IDs in one call."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: get_records_by_ids(db, Study, StudySchema, Study.study_id, ids),
+    )
 
 # Related Data APIs
-@app.get("/patient/{patient_id}/doctors", response_model=List[DoctorSchema])
-def get_doctors_for_patient(patient_id: int, db: Session = Depends(get_db)):
-    return db.query(Doctor).filter(Doctor.patient_id == patient_id).all()
-
-@app.get("/patient/{patient_id}/studies", response_model=List[StudySchema])
-def get_studies_for_patient(patient_id: int, db: Session = Depends(get_db)):
-    return db.query(Study).filter(Study.patient_id == patient_id).all()
-
-@app.get("/doctor/{doctor_id}/studies", response_model=List[StudySchema])
-def get_studies_for_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    return db.query(Study).filter(Study.doctor_id == doctor_id).all()
-
+@app.get("/patient/{patient_id}/doctors", response_model=List[DoctorSchema], tags=TOOL_TAGS)
+async def get_doctors_for_patient(patient_id: int, request: Request, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get all doctors associated with a specific patient."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: [DoctorSchema.model_validate(d) for d in db.query(Doctor).filter(Doctor.patient_id == patient_id).all()],
+    )
+
+@app.get("/patient/{patient_id}/studies", response_model=List[StudySchema], tags=TOOL_TAGS)
+async def get_studies_for_patient(patient_id: int, request: Request, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get all studies for a specific patient."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: [StudySchema.model_validate(study) for study in db.query(Study).filter(Study.patient_id == patient_id).all()],
+    )
+
+@app.get("/doctor/{doctor_id}/studies", response_model=List[StudySchema], tags=TOOL_TAGS)
+async def get_studies_for_doctor(doctor_id: int, request: Request, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get all studies conducted by a specific doctor."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: [StudySchema.model_validate(study) for study in db.query(Study).filter(Study.doctor_id == doctor_id).all()],
+    )
+
+@app.get("/patient/{patient_id}/overview", response_model=PatientOverviewSchema, tags=TOOL_TAGS)
+async def get_patient_overview(patient_id: int, request: Request, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get a patient together with their doctors and studies in one call."""
+    def load(db: Session):
+        # selectinload fetches each collection with one IN query: a fixed 3 queries
+        # regardless of how many doctors/studies the patient has (no N+1 lazy loads)
+        patient = (
+            db.query(PatientInfo)
+            .options(selectinload(PatientInfo.doctors), selectinload(PatientInfo.studies))
+            .filter(PatientInfo.id == patient_id)
+            .first()
+        )
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        return PatientOverviewSchema.model_validate(patient)
+    return await load_cached(request, db, cache, load)
 
 @app.post("/register")
-def register_user(username: str, email: str, password: str, doj:str, designation: str, department: str, location: str, db: Session = Depends(get_db)):
-    # Check if username or email exists
-    if db.query(Employee).filter_by(username=username).first():
-        raise HTTPException(status_code=400, detail="Username already exists")
-    if db.query(Employee).filter_by(email=email).first():
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    # Create new user
-    hashed_password = pbkdf2_sha256.hash(password)
-    new_employee = Employee(username=username, email=email, password=hashed_password, doj=doj, designation=designation, department=department, location=location)
-    db.add(new_employee)
-    db.commit()
-    db.refresh(new_employee)
-    return {"message": "Registration successful", "user_id": new_employee.id}
+async def register_user(username: str, email: str, password: str, doj:str, designation: str, department: str, location: str, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    try:
+        joined = date.fromisoformat(doj)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="doj must be a date in YYYY-MM-DD format")
+
+    def create(db: Session):
+        # Check if username or email exists
+        if db.query(Employee).filter_by(username=username).first():
+            raise HTTPException(status_code=400, detail="Username already exists")
+        if db.query(Employee).filter_by(email=email).first():
+            raise HTTPException(status_code=400, detail="Email already registered")
+
+        # Create new user
+        hashed_password = pbkdf2_sha256.hash(password)
+        new_employee = Employee(username=username, email=email, password=hashed_password, role="user", doj=joined, designation=designation, department=department, location=location)
+        db.add(new_employee)
+        db.commit()
+        db.refresh(new_employee)
+        return new_employee.id
+
+    user_id = await run_db(db, create)
+    # Employee reads (/employee/{id}, /employees) are cached; drop them after a write
+    cache.invalidate("/employee")
+    return {"message": "Registration successful", "user_id": user_id}
 
 # @app.post("/register")
-# def register_user(data: EmployeeSchema, db: Session = Depends(get_db)):
+# def register_user(data: EmployeeSchema, db: DbSession = Depends(get_db)):
 #     # Hash password
 #     hashed_password = pbkdf2_sha256.hash(data.password)
 
@@ -288,32 +673,101 @@ def register_user(username: str, email: str, password: str, doj:str, designation
 
 from datetime import datetime
 @app.get("/authenticate")
-def authenticate_user(username: str, password: str, db: Session = Depends(get_db)):
-    # Fetch user from DB
-    employee = db.query(Employee).filter_by(username=username).first()
-    if not employee:
-        raise HTTPException(status_code=404, detail="Username not found!")
-
-    # Verify password
-    if not pbkdf2_sha256.verify(password, employee.password):
-        raise HTTPException(status_code=401, detail="Incorrect password!")
-
-    # Update last login timestamp
-    employee.last_login = datetime.utcnow()
-    db.commit()
-
-    return {"status": "success", "message": "Login successful!", "username": employee.username,"role": employee.role,"id": employee.id}
-
-@app.get("/employee/{employee_id}", response_model=EmployeeSchema)
-def get_employee_by_id(employee_id: int, db: Session = Depends(get_db)):
-    emp = db.query(Employee).filter(Employee.id == employee_id).first()
-    if not emp:
-        raise HTTPException(status_code=404, detail="employee not found")
-    return emp
-
-@app.get("/employees", response_model=List[EmployeeSchema])
-def get_all_employees(db: Session = Depends(get_db)):
-    return db.query(Employee).all()
+async def authenticate_user(username: str, password: str, db: DbSession = Depends(get_db)):
+    def login(db: Session):
+        # Fetch user from DB
+        employee = db.query(Employee).filter_by(username=username).first()
+        if not employee:
+            raise HTTPException(status_code=404, detail="Username not found!")
+
+        # Verify password
+        if not pbkdf2_sha256.verify(password, employee.password):
+            raise HTTPException(status_code=401, detail="Incorrect password!")
+
+        # Update last login timestamp
+        employee.last_login = datetime.utcnow()
+        db.commit()
+
+        return {"status": "success", "message": "Login successful!", "username": employee.username,"role": employee.role,"id": employee.id}
+
+    return await run_db(db, login)
+
+@app.get(
+    "/employee/{employee_id}",
+    response_model=EmployeePublicSchema,
+    tags=TOOL_TAGS,
+    openapi_extra={"x-access": "self_or_admin", "x-owner-param": "employee_id"},
+)
+async def get_employee_by_id(employee_id: int, request: Request, db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get employee details by employee ID from the session."""
+    def load(db: Session):
+        emp = db.query(Employee).filter(Employee.id == employee_id).first()
+        if not emp:
+            raise HTTPException(status_code=404, detail="employee not found")
+        return EmployeePublicSchema.model_validate(emp)
+    return await load_cached(request, db, cache, load)
+
+@app.get(
+    "/employees/by-ids",
+    response_model=Dict[str, Any],
+    tags=TOOL_TAGS,
+    openapi_extra={"x-access": "self_or_admin", "x-owner-param": "ids"},
+)
+async def get_employees_by_ids(request: Request, ids: List[int] = Depends(ids_params), db: DbSession = Depends(get_db), cache: ResponseCache = Depends(get_response_cache)):
+    """Get details of several employees by their IDs in one call."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: get_records_by_ids(db, Employee, EmployeePublicSchema, Employee.id, ids),
+    )
+
+@app.get("/employees", response_model=RecordPage, tags=TOOL_TAGS)
+async def get_all_employees(
+    request: Request,
+    department: Optional[str] = Query(None, description="Filter by (partial) department"),
+    designation: Optional[str] = Query(None, description="Filter by (partial) designation"),
+    location: Optional[str] = Query(None, description="Filter by (partial) location"),
+    role: Optional[str] = Query(None, description="Filter by role ('admin' or 'user')"),
+    page: Dict[str, Any] = Depends(page_params),
+    db: DbSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_response_cache),
+):
+    """Get a paginated list of employees, optionally filtered and projected to selected fields. Returns {items, has_more, next_after_id}; pass next_after_id as after_id for the next page."""
+    return await load_cached(
+        request, db, cache,
+        lambda db: list_records(db, Employee, EmployeePublicSchema, Employee.id, page,
+                             exact={"role": role},
+                             contains={"department": department, "designation": designation, "location": location}),
+    )
+
+# Cache management
+admin_credentials = HTTPBasic()
+
+async def require_admin(credentials: HTTPBasicCredentials = Depends(admin_credentials), db: DbSession = Depends(get_db)):
+    """Allow only admin employees, checking HTTP Basic credentials the same way /authenticate does."""
+    def check(db: Session):
+        employee = db.query(Employee).filter_by(username=credentials.username).first()
+        if not employee or not pbkdf2_sha256.verify(credentials.password, employee.password):
+            raise HTTPException(status_code=401, detail="Invalid credentials", headers={"WWW-Authenticate": "Basic"})
+        if employee.role != "admin":
+            raise HTTPException(status_code=403, detail="Admin role required")
+        return employee.username
+
+    return await run_db(db, check)
+
+@app.get("/metrics/cache")
+async def get_cache_metrics(cache: ResponseCache = Depends(get_response_cache)):
+    """Hit/miss counters and hit ratio of the read-through response cache."""
+    return cache.stats()
+
+@app.post("/cache/invalidate", dependencies=[Depends(require_admin)])
+def invalidate_cache(prefix: Optional[str] = None, cache: ResponseCache = Depends(get_response_cache)):
+    """
+    Drop cached responses whose route starts with prefix (everything if omitted), e.g. after an external data load.
+    Admin only. The cache is per process: with several workers only the one serving the request is cleared,
+    the others expire their entries after SERVER_CACHE_TTL.
+    """
+    removed = cache.invalidate(prefix)
+    return {"message": "Cache invalidated", "prefix": prefix, "removed": removed}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8001)
@@ -0,0 +1,89 @@
+"""
+/patient/{id}/overview must load a patient with all doctors and studies in a
+constant number of statements (no N+1 lazy loads), whatever the relation count.
+
+Run with: python -m pytest tests (pytest comes from requirements-dev.txt)
+"""
+import os, sys
+
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["DB_ASYNC"] = "false"
+os.environ["DB_SEED_FROM_EXCEL"] = "false"
+os.environ.pop("SEED_ADMIN_PASSWORD", None)
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.server import mcp_server
+from src.server.mcp_server import PatientInfo, Doctor, Study
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(mcp_server.app) as client:
+        yield client
+
+
+def add_patient(n_doctors: int, studies_per_doctor: int) -> int:
+    """Insert a patient with n_doctors doctors, each with studies_per_doctor studies; returns the patient id."""
+    with mcp_server.SessionLocal() as db:
+        patient = PatientInfo(
+            name=f"Patient {n_doctors}x{studies_per_doctor}", age=40, gender="F", diagnosis="Test",
+            contact_number="555-0100", email="patient@example.com", admission_date="2024-01-01",
+        )
+        db.add(patient)
+        db.flush()
+        for d in range(n_doctors):
+            doctor = Doctor(
+                doctor_name=f"Doctor {d}", designation="Consultant", specialization="General",
+                title="Dr.", description="Test doctor", patient_id=patient.id,
+            )
+            db.add(doctor)
+            db.flush()
+            for s in range(studies_per_doctor):
+                db.add(Study(
+                    patient_id=patient.id, doctor_id=doctor.id, study_type="MRI",
+                    study_date="2024-01-02", findings=f"Finding {s}",
+                ))
+        db.commit()
+        return patient.id
+
+
+def count_statements(client: TestClient, path: str) -> tuple:
+    """Statements executed while serving one GET request, and the response."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(mcp_server.engine, "before_cursor_execute", record)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(mcp_server.engine, "before_cursor_execute", record)
+    return len(statements), response
+
+
+def test_overview_query_count_is_constant(client):
+    small = add_patient(n_doctors=1, studies_per_doctor=1)
+    large = add_patient(n_doctors=6, studies_per_doctor=5)
+
+    small_count, small_response = count_statements(client, f"/patient/{small}/overview")
+    large_count, large_response = count_statements(client, f"/patient/{large}/overview")
+
+    assert small_response.status_code == 200
+    assert large_response.status_code == 200
+    assert len(large_response.json()["doctors"]) == 6
+    assert len(large_response.json()["studies"]) == 30
+    assert large_count == small_count
+    # Patient plus one selectin query per relation
+    assert large_count <= 3
+
+
+def test_overview_missing_patient(client):
+    assert client.get("/patient/999999/overview").status_code == 404